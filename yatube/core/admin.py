@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'attempts', 'progress', 'total', 'created',
+        'updated')
+    list_filter = ('status',)
+    search_fields = ('name',)
+    readonly_fields = ('error',)
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,28 @@
+"""Бэкенд аутентификации с кэшем пользователя.
+
+``AuthenticationMiddleware`` загружает пользователя на каждом запросе.
+``CachedModelBackend`` держит его в кэше ``AUTH_USER_CACHE_TIMEOUT``
+секунд; запись сбрасывается при сохранении пользователя (смена пароля,
+блокировка) и при выходе — см. ``core.signals``. Массовые ``update()``
+сигналов не вызывают, после них нужен ``forget``.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+KEY = 'auth-user:{}'
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+
+
+def forget(user_ids):
+    cache.delete_many([KEY.format(user_id) for user_id in user_ids])
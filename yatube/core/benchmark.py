@@ -0,0 +1,111 @@
+"""Накладные расходы сессии и аутентификации.
+
+``measure_sessions`` пропускает запросы вошедшего пользователя через
+``SessionMiddleware`` и ``AuthenticationMiddleware`` с пустым view и
+считает SQL-запросы и время на запрос для каждого режима из
+``SESSION_MODES``. Каждый ``WRITE_EVERY``-й запрос меняет данные сессии.
+Пользователь создаётся в транзакции, которая откатывается после замера.
+
+``measure_hashers`` замеряет проверку пароля каждым хэшером из
+``PASSWORD_HASHER_CLASSES``: сколько входов в секунду выдерживает одно
+ядро.
+"""
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model)
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils.module_loading import import_string
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+CACHED_BACKEND = 'core.auth.CachedModelBackend'
+SESSION_MODES = {
+    'db': ('django.contrib.sessions.backends.db', MODEL_BACKEND),
+    'cached_db': ('django.contrib.sessions.backends.cached_db',
+                  MODEL_BACKEND),
+    'cache': ('core.sessions', CACHED_BACKEND),
+    'signed_cookies': ('django.contrib.sessions.backends.signed_cookies',
+                       CACHED_BACKEND),
+}
+WRITE_EVERY = 10
+PASSWORD = 'benchmark-password'
+
+
+def _view(request):
+    if request.user.is_authenticated and request.GET.get('write'):
+        request.session['visits'] = request.session.get('visits', 0) + 1
+    return HttpResponse()
+
+
+def _login(user, engine, backend):
+    session = import_module(engine).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = backend
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+def _measure_mode(user, engine, backend, iterations):
+    handler = SessionMiddleware(AuthenticationMiddleware(_view))
+    factory = RequestFactory()
+    cookie = _login(user, engine, backend)
+    queries = 0
+    elapsed = 0.0
+    for number in range(iterations):
+        data = {'write': 1} if number % WRITE_EVERY == 0 else {}
+        request = factory.get('/', data)
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = cookie
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = handler(request)
+            elapsed += time.perf_counter() - start
+        queries += len(captured)
+        if settings.SESSION_COOKIE_NAME in response.cookies:
+            cookie = response.cookies[settings.SESSION_COOKIE_NAME].value
+    return {
+        'queries': queries / iterations,
+        'time': elapsed / iterations * 1000,
+    }
+
+
+def measure_sessions(iterations=200):
+    """SQL-запросы и миллисекунды на запрос для каждого режима."""
+    results = {}
+    with transaction.atomic():
+        user = get_user_model().objects.create(username='session-benchmark')
+        for mode, (engine, backend) in SESSION_MODES.items():
+            caches[settings.SESSION_CACHE_ALIAS].clear()
+            with override_settings(
+                    SESSION_ENGINE=engine,
+                    AUTHENTICATION_BACKENDS=[backend]):
+                results[mode] = _measure_mode(
+                    user, engine, backend, iterations)
+        transaction.set_rollback(True)
+    return results
+
+
+def measure_hashers(iterations=20):
+    """Миллисекунды на проверку пароля и входы в секунду на ядро."""
+    results = {}
+    for name, path in settings.PASSWORD_HASHER_CLASSES.items():
+        hasher = import_string(path)()
+        try:
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+        except ValueError:
+            # Библиотека хэшера (argon2-cffi) не установлена.
+            continue
+        start = time.perf_counter()
+        for _ in range(iterations):
+            hasher.verify(PASSWORD, encoded)
+        per_login = (time.perf_counter() - start) / iterations
+        results[name] = {'time': per_login * 1000, 'per_second': 1 / per_login}
+    return results
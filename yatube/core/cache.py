@@ -0,0 +1,220 @@
+"""Общий для всех процессов кэш поверх Redis.
+
+``RedisCache`` — бэкенд Django-кэша с общим пулом соединений на процесс.
+Клиент задаётся опцией ``CLIENT_CLASS``: по умолчанию это ``redis.Redis``,
+а ``InProcessRedis`` — совместимая по нужным командам замена, которая
+хранит данные в памяти процесса и позволяет гонять тесты без сервера.
+"""
+import math
+import pickle
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+DEFAULT_CLIENT_CLASS = 'redis.Redis'
+DEFAULT_MAX_CONNECTIONS = 50
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class RedisCache(BaseCache):
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._location = server
+        self._client_class = options.get('CLIENT_CLASS', DEFAULT_CLIENT_CLASS)
+        self._max_connections = options.get(
+            'MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)
+
+    @property
+    def client(self):
+        """Один клиент (и пул соединений) на процесс для каждого адреса."""
+        key = (self._client_class, self._location)
+        client = _clients.get(key)
+        if client is None:
+            with _clients_lock:
+                client = _clients.get(key)
+                if client is None:
+                    client_class = import_string(self._client_class)
+                    client = client_class.from_url(
+                        self._location, max_connections=self._max_connections)
+                    _clients[key] = client
+        return client
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expiry_ms(self, timeout):
+        """Время жизни в миллисекундах; 0 и меньше — ключ уже истёк."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return math.ceil(timeout * 1000)
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(raw):
+        if raw is None:
+            return None
+        try:
+            return int(raw)
+        except ValueError:
+            return pickle.loads(raw)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expiry = self._expiry_ms(timeout)
+        if expiry is not None and expiry <= 0:
+            return False
+        return bool(self.client.set(
+            key, self._encode(value), px=expiry, nx=True))
+
+    def get(self, key, default=None, version=None):
+        value = self._decode(self.client.get(self._key(key, version)))
+        return default if value is None else value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expiry = self._expiry_ms(timeout)
+        if expiry is not None and expiry <= 0:
+            self.client.delete(key)
+            return
+        self.client.set(key, self._encode(value), px=expiry)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expiry = self._expiry_ms(timeout)
+        if expiry is None:
+            return bool(self.client.persist(key))
+        if expiry <= 0:
+            return bool(self.client.delete(key))
+        return bool(self.client.pexpire(key, expiry))
+
+    def delete(self, key, version=None):
+        self.client.delete(self._key(key, version))
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        made = [self._key(key, version) for key in keys]
+        values = self.client.mget(made)
+        return {
+            key: self._decode(raw)
+            for key, raw in zip(keys, values) if raw is not None
+        }
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version)
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def has_key(self, key, version=None):
+        return bool(self.client.exists(self._key(key, version)))
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        if not self.client.exists(key):
+            raise ValueError(f"Key '{key}' not found")
+        return self.client.incrby(key, delta)
+
+    def clear(self):
+        self.client.flushdb()
+
+
+class InProcessRedis:
+    """Подмножество команд redis-py в памяти процесса.
+
+    Клиенты с одинаковым адресом делят одно хранилище, как процессы,
+    подключённые к одному серверу.
+    """
+    _servers = {}
+    _servers_lock = threading.Lock()
+
+    def __init__(self, location):
+        with self._servers_lock:
+            self._data, self._lock = self._servers.setdefault(
+                location, ({}, threading.RLock()))
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        return cls(url)
+
+    def _alive(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._alive(key)
+            return None if item is None else item[0]
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, px=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key) is not None:
+                return None
+            expires = None if px is None else time.monotonic() + px / 1000
+            self._data[key] = (value, expires)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(
+                self._data.pop(key, None) is not None for key in keys)
+
+    def exists(self, key):
+        with self._lock:
+            return int(self._alive(key) is not None)
+
+    def incrby(self, key, amount):
+        with self._lock:
+            item = self._alive(key)
+            value, expires = item if item else (b'0', None)
+            value = int(value) + amount
+            self._data[key] = (str(value).encode(), expires)
+            return value
+
+    def pexpire(self, key, ms):
+        with self._lock:
+            item = self._alive(key)
+            if item is None:
+                return False
+            self._data[key] = (item[0], time.monotonic() + ms / 1000)
+            return True
+
+    def persist(self, key):
+        with self._lock:
+            item = self._alive(key)
+            if item is None:
+                return False
+            self._data[key] = (item[0], None)
+            return True
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
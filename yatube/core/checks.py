@@ -0,0 +1,46 @@
+"""Проверки настроек, которые ``manage.py check`` сам не заметит.
+
+Фоновые задачи (``core.tasks``) сбрасывают версии кэша лент, закэшированных
+пользователей, графа подписок и миниатюр. Если задачи выполняет отдельный
+``runworker``, а кэш живёт в памяти процесса, сброс остаётся в памяти
+воркера, и веб-процессы продолжают отдавать устаревшие данные.
+"""
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import Error, Tags, register
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+PROCESS_LOCAL_CLIENTS = ('core.cache.InProcessRedis',)
+
+
+def _process_local(alias):
+    config = settings.CACHES.get(alias, {})
+    return (config.get('BACKEND') in PROCESS_LOCAL_BACKENDS
+            or config.get('OPTIONS', {}).get('CLIENT_CLASS')
+            in PROCESS_LOCAL_CLIENTS)
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache(app_configs, **kwargs):
+    """Задачи вне процесса запроса требуют общего для процессов кэша."""
+    if getattr(settings, 'TASKS_ALWAYS_EAGER', False):
+        return []
+    aliases = sorted({
+        DEFAULT_CACHE_ALIAS,
+        settings.SESSION_CACHE_ALIAS,
+        getattr(settings, 'THUMBNAIL_CACHE', DEFAULT_CACHE_ALIAS),
+    })
+    return [
+        Error(
+            f'Кэш «{alias}» хранится в памяти процесса, а фоновые задачи '
+            f'выполняет отдельный runworker: сброс кэша из задач не увидят '
+            f'веб-процессы.',
+            hint='Укажите общий CACHE_BACKEND (redis, memcached, file) '
+                 'или TASKS_ALWAYS_EAGER=1.',
+            id='core.E001',
+        )
+        for alias in aliases if _process_local(alias)
+    ]
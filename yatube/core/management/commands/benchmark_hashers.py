@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Замеряет проверку пароля каждым хэшером: входов в секунду на ядро'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        results = benchmark.measure_hashers(options['iterations'])
+        self.stdout.write(f'{"хэшер":<10}{"мс":>10}{"входов/с":>12}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<10}{result["time"]:>10.1f}'
+                f'{result["per_second"]:>12.1f}')
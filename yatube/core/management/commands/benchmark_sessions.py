@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет SQL-запросы и время сессии и аутентификации на запрос '
+        'вошедшего пользователя в разных режимах хранения сессий')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        results = benchmark.measure_sessions(options['iterations'])
+        self.stdout.write(
+            f'{"режим":<16}{"запросов":>10}{"мс":>10}')
+        for mode, result in results.items():
+            self.stdout.write(
+                f'{mode:<16}{result["queries"]:>10.2f}'
+                f'{result["time"]:>10.3f}')
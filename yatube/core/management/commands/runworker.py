@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import checks, tasks
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркер фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить задачи из очереди и выйти')
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Пауза между опросами пустой очереди, секунды')
+
+    def handle(self, *args, **options):
+        errors = checks.shared_cache(None)
+        if errors:
+            raise CommandError('\n'.join(
+                f'{error.msg} {error.hint}' for error in errors))
+        while True:
+            done = tasks.run_pending()
+            if done:
+                self.stdout.write(f'Выполнено задач: {done}')
+            if options['once']:
+                break
+            if not done:
+                time.sleep(options['sleep'])
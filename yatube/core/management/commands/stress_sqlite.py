@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from core import sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает SQLite параллельными записями и сравнивает настройки '
+        'по умолчанию с SQLITE_PRAGMAS и повтором записей')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--writes', type=int, default=200,
+            help='Число записей на процесс')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"режим":<10}{"записей":>10}{"ошибок":>10}'
+            f'{"повторов":>10}{"записей/с":>12}')
+        results = {}
+        for mode in sqlite.STRESS_MODES:
+            result = results[mode] = sqlite.stress(
+                mode, options['workers'], options['writes'])
+            self.stdout.write(
+                f'{mode:<10}{result["writes"]:>10}{result["errors"]:>10}'
+                f'{result["retries"]:>10}{result["per_second"]:>12.1f}')
+        base, tuned = results['default'], results['tuned']
+        self.stdout.write(self.style.SUCCESS(
+            f'Пропускная способность: '
+            f'x{tuned["per_second"] / base["per_second"]:.1f}'))
@@ -0,0 +1,135 @@
+"""Раздача загруженных файлов из ``MEDIA_ROOT``.
+
+При ``MEDIA_ACCEL_REDIRECT`` view только проверяет путь и отвечает
+заголовком ``X-Accel-Redirect`` на internal-location nginx: файл, Range и
+условные запросы обслуживает nginx. Иначе файл отдаёт ``FileResponse``
+(сервер приложений передаёт его через ``wsgi.file_wrapper``/sendfile) с
+поддержкой одного диапазона ``Range`` и условных запросов по ETag и
+Last-Modified.
+
+Все файлы, включая миниатюры, кэшируются на ``MEDIA_MAX_AGE`` секунд.
+Имена миниатюр sorl-thumbnail — хэш имени исходника и параметров, а не
+содержимого: после замены файла под тем же именем URL миниатюры не
+меняется, поэтому ``immutable`` им не выставляется, а устаревшая копия
+перепроверяется по ETag.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.encoding import escape_uri_path
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Часть файла для ``FileResponse``: чтение не выходит за диапазон."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _full_path(path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return full_path
+
+
+def byte_range(header, size):
+    """Диапазон (начало, конец) включительно или ``None``, если заголовок
+    не разобран или диапазонов несколько; ``ValueError`` — диапазон
+    за пределами файла."""
+    match = RANGE.match(header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end or not int(end):
+            raise ValueError(header)
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size:
+        raise ValueError(header)
+    if start > end:
+        return None
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    condition = request.META.get('HTTP_IF_RANGE')
+    if condition is None or condition == etag:
+        return True
+    return parse_http_date_safe(condition) == last_modified
+
+
+def _file_response(request, path, full_path, size, etag, last_modified):
+    content_type = (
+        mimetypes.guess_type(full_path)[0] or 'application/octet-stream')
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT + escape_uri_path(path))
+        return response
+    requested = None
+    if ('HTTP_RANGE' in request.META
+            and _if_range_matches(request, etag, last_modified)):
+        try:
+            requested = byte_range(request.META['HTTP_RANGE'], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    file = open(full_path, 'rb')
+    if requested is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = requested
+        response = FileResponse(
+            FileRange(file, start, end - start + 1), status=206,
+            content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve(request, path):
+    full_path = _full_path(path)
+    stat = os.stat(full_path)
+    etag = quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(
+            request, path, full_path, stat.st_size, etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(
+        response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
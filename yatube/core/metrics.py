@@ -0,0 +1,261 @@
+"""Метрики запросов для продакшена.
+
+``MetricsMiddleware`` замеряет часть запросов (доля — настройка
+``METRICS_SAMPLE_RATE``): полное время, число и время SQL-запросов (через
+``execute_wrapper`` всех соединений), время рендера шаблонов (бэкенд
+``TimedDjangoTemplates``) и попадания в кэш страниц. Замер отдаётся
+заголовком ``Server-Timing`` и копится в гистограммах по имени view.
+Незамеренный запрос стоит одного ``random()`` и увеличения счётчика.
+
+Гистограммы хранятся в памяти процесса; ``/metrics/`` отдаёт их в
+текстовом формате Prometheus, поэтому каждый воркер — отдельная цель
+сбора.
+"""
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+UNRESOLVED = '<unresolved>'
+EXCLUDED_VIEWS = ('metrics',)
+
+_current = threading.local()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+        yield '+Inf', self.total
+
+
+HISTOGRAMS = (
+    ('request_duration_seconds', DURATION_BUCKETS,
+     'Полное время обработки запроса'),
+    ('db_queries', QUERY_BUCKETS, 'Число SQL-запросов на запрос'),
+    ('db_duration_seconds', DURATION_BUCKETS,
+     'Суммарное время SQL-запросов'),
+    ('template_duration_seconds', DURATION_BUCKETS,
+     'Суммарное время рендера шаблонов'),
+)
+
+COUNTERS = (
+    ('requests_total', 'Все запросы, включая незамеренные'),
+    ('cache_hits_total', 'Страницы, отданные из кэша'),
+    ('cache_misses_total', 'Страницы, собранные заново'),
+)
+
+
+class Registry:
+    """Гистограммы и счётчики по имени view; потокобезопасен."""
+
+    prefix = 'yatube_'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def _inc(self, name, view, amount):
+        key = (name, view)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def inc(self, name, view, amount=1):
+        with self._lock:
+            self._inc(name, view, amount)
+
+    def observe(self, view, sample):
+        with self._lock:
+            for name, buckets, _ in HISTOGRAMS:
+                histogram = self.histograms.get((name, view))
+                if histogram is None:
+                    histogram = self.histograms[(name, view)] = Histogram(
+                        buckets)
+                histogram.observe(sample[name])
+            if sample['cache_hits']:
+                self._inc('cache_hits_total', view, sample['cache_hits'])
+            if sample['cache_misses']:
+                self._inc('cache_misses_total', view, sample['cache_misses'])
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        with self._lock:
+            for name, _, description in HISTOGRAMS:
+                metric = self.prefix + name
+                lines += [f'# HELP {metric} {description}',
+                          f'# TYPE {metric} histogram']
+                for (found, view), histogram in sorted(
+                        self.histograms.items()):
+                    if found != name:
+                        continue
+                    label = _label(view)
+                    for bound, count in histogram.cumulative():
+                        lines.append(
+                            f'{metric}_bucket{{view="{label}",'
+                            f'le="{bound}"}} {count}')
+                    lines.append(
+                        f'{metric}_sum{{view="{label}"}} {histogram.sum:g}')
+                    lines.append(
+                        f'{metric}_count{{view="{label}"}} {histogram.total}')
+            for name, description in COUNTERS:
+                metric = self.prefix + name
+                lines += [f'# HELP {metric} {description}',
+                          f'# TYPE {metric} counter']
+                for (found, view), value in sorted(self.counters.items()):
+                    if found == name:
+                        lines.append(
+                            f'{metric}{{view="{_label(view)}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _label(value):
+    return value.replace('\\', r'\\').replace('"', r'\"')
+
+
+class Sample:
+    """Замер одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0
+        self.template_time = 0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def as_dict(self, duration):
+        return {
+            'request_duration_seconds': duration,
+            'db_queries': self.queries,
+            'db_duration_seconds': self.db_time,
+            'template_duration_seconds': self.template_time,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def current():
+    """Замер текущего запроса или None, если запрос не замеряется."""
+    return getattr(_current, 'sample', None)
+
+
+def record_cache(hit):
+    sample = current()
+    if sample is None:
+        return
+    if hit:
+        sample.cache_hits += 1
+    else:
+        sample.cache_misses += 1
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        sample = current()
+        if sample is None:
+            return super().render(context, request)
+        sample.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.template_depth -= 1
+            if not sample.template_depth:
+                sample.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """``DjangoTemplates``, чьи шаблоны учитывают время рендера."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+def server_timing(sample, duration):
+    parts = [
+        f'db;dur={sample.db_time * 1000:.1f};desc="{sample.queries} queries"',
+        f'tpl;dur={sample.template_time * 1000:.1f}',
+    ]
+    if sample.cache_hits or sample.cache_misses:
+        state = 'miss' if sample.cache_misses else 'hit'
+        parts.append(f'cache;desc="{state}"')
+    parts.append(f'total;dur={duration * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class MetricsMiddleware:
+    """Должен стоять первым в ``MIDDLEWARE``, чтобы мерить всё время."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, 'METRICS_SAMPLE_RATE', 0)
+        if not rate or random.random() >= rate:
+            response = self.get_response(request)
+            registry.inc('requests_total', _view_name(request))
+            return response
+        sample = _current.sample = Sample()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(sample))
+                response = self.get_response(request)
+        finally:
+            _current.sample = None
+        duration = time.perf_counter() - sample.started
+        view = _view_name(request)
+        registry.inc('requests_total', view)
+        if view not in EXCLUDED_VIEWS:
+            registry.observe(view, sample.as_dict(duration))
+        response['Server-Timing'] = server_timing(sample, duration)
+        return response
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNRESOLVED
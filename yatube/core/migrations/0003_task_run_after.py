@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_task_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='run_after',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,82 @@
+"""Чтение лент с реплик, запись и read-your-writes — на основной базе.
+
+``ReplicaRoutingMiddleware`` разрешает чтение с реплик только для
+GET/HEAD-запросов к view из ``DATABASE_REPLICA_VIEWS``. Всё остальное, в
+том числе чтения внутри транзакции и чтения после первой записи в том же
+запросе, идёт на ``default``. После изменяющего запроса клиент получает
+cookie, и ещё ``DATABASE_REPLICA_PIN_SECONDS`` секунд все его запросы
+читают с основной базы — реплики успевают догнать её, и пользователь
+видит собственные изменения. Внутри ``primary_reads()`` чтение тоже идёт
+с основной базы: так собираются страницы для кэша, области которых
+менялись последние ``DATABASE_REPLICA_PIN_SECONDS`` секунд.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_state = threading.local()
+
+
+def replica_reads_allowed():
+    return (getattr(_state, 'replica_reads', False)
+            and not getattr(_state, 'primary_only', False))
+
+
+@contextmanager
+def primary_reads():
+    """Временно направляет все чтения на основную базу."""
+    outer = getattr(_state, 'primary_only', False)
+    _state.primary_only = True
+    try:
+        yield
+    finally:
+        _state.primary_only = outer
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or not replica_reads_allowed()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _state.replica_reads = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.replica_reads = False
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _state.replica_reads = (
+            request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            and request.resolver_match.view_name
+            in settings.DATABASE_REPLICA_VIEWS)
@@ -0,0 +1,45 @@
+"""Сессии в общем кэше с отложенной записью в базу.
+
+Сессия читается из кэша, база нужна только при промахе. Новая сессия,
+удаление (выход) и любое изменение данных входа (пользователь, бэкенд,
+хэш пароля) сразу пишутся в базу, а прочие изменения — только в кэш:
+строка в базе обновляется не чаще раза в ``SESSION_WRITE_BEHIND``
+секунд. Если кэш потерял сессию, она восстанавливается из базы без
+изменений последних секунд, но вход и выход не теряются никогда.
+"""
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.contrib.sessions.backends.cached_db import \
+    SessionStore as CachedDBStore
+
+KEY_PREFIX = 'core.sessions'
+SYNCED_PREFIX = 'core.sessions.synced:'
+AUTH_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def _auth_state(self):
+        return [self._session.get(key) for key in AUTH_KEYS]
+
+    def _synced(self):
+        """Данные входа совпадают с базой, и она обновлялась недавно."""
+        synced = self._cache.get(SYNCED_PREFIX + self.session_key)
+        return synced == self._auth_state()
+
+    def save(self, must_create=False):
+        if self.session_key is None or must_create or not self._synced():
+            super().save(must_create)
+            self._cache.set(
+                SYNCED_PREFIX + self.session_key, self._auth_state(),
+                settings.SESSION_WRITE_BEHIND)
+            return
+        self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+
+    def delete(self, session_key=None):
+        session_key = session_key or self.session_key
+        super().delete(session_key)
+        if session_key is not None:
+            self._cache.delete(SYNCED_PREFIX + session_key)
@@ -0,0 +1,171 @@
+"""Настройка SQLite для нескольких воркеров.
+
+При открытии соединения применяются ``SQLITE_PRAGMAS``: журнал WAL
+(читатели не блокируют писателя и наоборот), ``synchronous=NORMAL`` (в
+режиме WAL не теряет целостность при сбое процесса), отображение файла в
+память и увеличенный кэш страниц. Ожидание блокировки задаётся опцией
+``timeout`` соединения.
+
+Транзакция, начатая чтением, не может дождаться блокировки на запись:
+SQLite сразу отвечает «database is locked». Такие записи повторяет
+``retry_on_locked`` с экспоненциальной задержкой.
+
+``stress`` запускает несколько процессов, которые одновременно пишут в
+отдельный файл базы и читают из него, и сравнивает пропускную
+способность настроек SQLite по умолчанию (журнал DELETE, без повторов) с
+``SQLITE_PRAGMAS`` и ``retry_on_locked``.
+"""
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, OperationalError, connection,
+                       connections)
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test.utils import override_settings
+
+RETRY_ATTEMPTS = 5
+RETRY_DELAY = 0.05
+STRESS_MODES = {
+    'default': {'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+                'retry': False},
+    'tuned': {'pragmas': None, 'retry': True},
+}
+STRESS_TIMEOUT = 1
+STRESS_READS = 5
+
+stats = {'retries': 0}
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+def retry_on_locked(func=None, attempts=RETRY_ATTEMPTS, delay=RETRY_DELAY):
+    """Повторяет запись, если база занята другим процессом.
+
+    Внутри внешней транзакции повтор бесполезен, поэтому там ошибка
+    пробрасывается сразу.
+    """
+    if func is None:
+        return lambda func: retry_on_locked(func, attempts, delay)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(attempts):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as error:
+                if (attempt == attempts - 1 or not is_locked(error)
+                        or connection.in_atomic_block):
+                    raise
+            stats['retries'] += 1
+            time.sleep(delay * 2 ** attempt * (0.5 + random.random()))
+    return wrapper
+
+
+def _write(conn, worker):
+    """Типичная запись Django: чтение и вставка в одной транзакции."""
+    with conn.cursor() as cursor:
+        cursor.execute('BEGIN')
+        try:
+            cursor.execute(
+                'SELECT COUNT(*) FROM stress WHERE worker = %s', [worker])
+            count = cursor.fetchone()[0]
+            cursor.execute(
+                'INSERT INTO stress (worker, value) VALUES (%s, %s)',
+                [worker, 'x' * 200 + str(count)])
+            cursor.execute('COMMIT')
+        finally:
+            if conn.connection.in_transaction:
+                cursor.execute('ROLLBACK')
+
+
+def _read(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            'SELECT worker, COUNT(*) FROM stress GROUP BY worker')
+        cursor.fetchall()
+
+
+def _connect(path, mode):
+    pragmas = STRESS_MODES[mode]['pragmas']
+    if pragmas is None:
+        pragmas = settings.SQLITE_PRAGMAS
+    conn = DatabaseWrapper(dict(
+        connections['default'].settings_dict,
+        ENGINE='django.db.backends.sqlite3', NAME=path,
+        OPTIONS={'timeout': STRESS_TIMEOUT}))
+    with override_settings(SQLITE_PRAGMAS=pragmas):
+        conn.ensure_connection()
+    return conn
+
+
+def _stress_worker(path, mode, worker, writes):
+    # Воркер унаследовал соединение родителя, возможно, внутри транзакции;
+    # retry_on_locked должен видеть соединение с файлом нагрузки.
+    conn = connections[DEFAULT_DB_ALIAS] = _connect(path, mode)
+    stats['retries'] = 0
+    write = _write
+    if STRESS_MODES[mode]['retry']:
+        write = retry_on_locked(_write)
+    done = failed = 0
+    for _ in range(writes):
+        try:
+            write(conn, worker)
+            done += 1
+        except OperationalError as error:
+            if not is_locked(error):
+                raise
+            failed += 1
+        for _ in range(STRESS_READS):
+            _read(conn)
+    conn.close()
+    return done, failed, stats['retries']
+
+
+def _prepare(path, mode):
+    """Создаёт таблицу; режим журнала сохраняется в файле базы."""
+    conn = _connect(path, mode)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            'CREATE TABLE stress (id INTEGER PRIMARY KEY, '
+            'worker INTEGER NOT NULL, value TEXT NOT NULL)')
+    conn.close()
+
+
+def stress(mode, workers=4, writes=200):
+    """Пишет ``writes`` раз из каждого из ``workers`` процессов.
+
+    Возвращает число успешных записей, ошибок блокировки, повторов и
+    записей в секунду.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'stress.sqlite3')
+        _prepare(path, mode)
+        context = multiprocessing.get_context('fork')
+        with context.Pool(workers) as pool:
+            start = time.perf_counter()
+            results = pool.starmap(_stress_worker, [
+                (path, mode, worker, writes) for worker in range(workers)])
+            elapsed = time.perf_counter() - start
+    done, failed, retries = (sum(column) for column in zip(*results))
+    return {
+        'writes': done,
+        'errors': failed,
+        'retries': retries,
+        'per_second': done / elapsed,
+    }
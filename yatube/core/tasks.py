@@ -0,0 +1,131 @@
+"""Простая очередь фоновых задач в базе данных.
+
+Функция, помеченная ``@task``, получает метод ``delay(**kwargs)``, который
+кладёт вызов в таблицу ``Task``, и ``delay_after(countdown, **kwargs)`` —
+то же, но воркер возьмёт задачу не раньше чем через ``countdown`` секунд.
+Задачи разбирает ``manage.py runworker``.
+Строка задачи создаётся в той же транзакции, что и изменение данных, так
+что задача не потеряется и не выполнится для отменённой записи. При
+``TASKS_ALWAYS_EAGER = True`` задачи выполняются сразу, без очереди.
+
+Задача выполняется в одной транзакции. Долгие задачи, помеченные
+``@task(atomic=False)``, сами фиксируют работу порциями и сообщают
+прогресс через ``report_progress``.
+"""
+import json
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+from .sqlite import retry_on_locked
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+
+registry = {}
+
+_current = threading.local()
+
+
+def task(func=None, atomic=True):
+    if func is None:
+        return lambda func: task(func, atomic)
+    name = f'{func.__module__}.{func.__name__}'
+    registry[name] = func
+
+    def delay(**kwargs):
+        return enqueue(name, kwargs)
+
+    def delay_after(countdown, **kwargs):
+        return enqueue(name, kwargs, countdown)
+    func.task_name = name
+    func.atomic = atomic
+    func.delay = delay
+    func.delay_after = delay_after
+    return func
+
+
+def enqueue(name, kwargs, countdown=None):
+    if getattr(settings, 'TASKS_ALWAYS_EAGER', False):
+        registry[name](**kwargs)
+        return None
+    run_after = None
+    if countdown is not None:
+        run_after = timezone.now() + timedelta(seconds=countdown)
+    return Task.objects.create(
+        name=name, payload=json.dumps(kwargs), run_after=run_after)
+
+
+@retry_on_locked
+def _claim():
+    """Берёт первую задачу из очереди; гонку воркеров решает UPDATE."""
+    while True:
+        candidate = Task.objects.filter(
+            Q(run_after__isnull=True) | Q(run_after__lte=timezone.now()),
+            status=Task.PENDING,
+        ).order_by('pk').values_list('pk', flat=True).first()
+        if candidate is None:
+            return None
+        claimed = Task.objects.filter(
+            pk=candidate, status=Task.PENDING).update(status=Task.RUNNING)
+        if claimed:
+            return Task.objects.get(pk=candidate)
+
+
+def run(task_obj):
+    task_obj.attempts += 1
+    try:
+        func = registry[task_obj.name]
+        _current.task = task_obj
+        if func.atomic:
+            with transaction.atomic():
+                func(**json.loads(task_obj.payload))
+        else:
+            func(**json.loads(task_obj.payload))
+    except Exception:
+        logger.exception('Задача %s упала', task_obj)
+        task_obj.error = traceback.format_exc()
+        task_obj.status = (
+            Task.PENDING if task_obj.attempts < MAX_ATTEMPTS else Task.FAILED)
+    else:
+        task_obj.error = ''
+        task_obj.status = Task.DONE
+    finally:
+        _current.task = None
+    task_obj.save(update_fields=['attempts', 'error', 'status', 'updated'])
+    return task_obj
+
+
+def report_progress(done, total=None):
+    """Сохраняет прогресс выполняемой задачи; вне воркера ничего не делает.
+    """
+    task_obj = getattr(_current, 'task', None)
+    if task_obj is None:
+        return
+    task_obj.progress = done
+    fields = {'progress': done, 'updated': timezone.now()}
+    if total is not None:
+        task_obj.total = fields['total'] = total
+    Task.objects.filter(pk=task_obj.pk).update(**fields)
+
+
+def run_pending(limit=None):
+    """Выполняет задачи из очереди; возвращает число выполненных."""
+    autodiscover_modules('tasks')
+    done = 0
+    while limit is None or done < limit:
+        task_obj = _claim()
+        if task_obj is None:
+            break
+        run(task_obj)
+        done += 1
+    return done
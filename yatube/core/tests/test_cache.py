@@ -0,0 +1,79 @@
+import time
+
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import RedisCache
+from posts.models import Post, User
+
+SHARED_CACHE = {
+    'default': {
+        'BACKEND': 'core.cache.RedisCache',
+        'LOCATION': 'inprocess://tests',
+        'OPTIONS': {'CLIENT_CLASS': 'core.cache.InProcessRedis'},
+    }
+}
+SHARED_CACHE['post_fragments'] = SHARED_CACHE['default']
+
+
+def make_worker_cache():
+    """Отдельный экземпляр бэкенда, как в другом воркере gunicorn."""
+    return RedisCache('inprocess://tests', {
+        'OPTIONS': {'CLIENT_CLASS': 'core.cache.InProcessRedis'},
+    })
+
+
+class RedisCacheTests(TestCase):
+    def setUp(self):
+        self.cache = make_worker_cache()
+        self.cache.clear()
+
+    def test_values_round_trip(self):
+        """Значения любых типов сохраняются и читаются"""
+        values = {'int': 5, 'str': 'строка', 'dict': {'a': [1, 2]},
+                  'bytes': b'\x00\xff'}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many(values.keys()), values)
+        self.assertIsNone(self.cache.get('missing'))
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+
+    def test_add_incr_delete(self):
+        """add не перезаписывает ключ, incr работает только по ключу"""
+        self.assertTrue(self.cache.add('lock', 1))
+        self.assertFalse(self.cache.add('lock', 2))
+        self.assertEqual(self.cache.incr('lock', 5), 6)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.cache.delete('lock')
+        self.assertFalse(self.cache.has_key('lock'))
+
+    def test_timeout(self):
+        """Ключ истекает по таймауту"""
+        self.cache.set('short', 'value', 0.05)
+        self.cache.set('forever', 'value', None)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertEqual(self.cache.get('forever'), 'value')
+
+    def test_shared_between_workers(self):
+        """Разные воркеры видят общие данные"""
+        self.cache.set('shared', 'value')
+        self.assertEqual(make_worker_cache().get('shared'), 'value')
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class SharedFeedCacheTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.author = User.objects.create(username='author')
+        Post.objects.create(author=self.author, text='Пост')
+
+    def test_feed_page_served_from_shared_cache(self):
+        """Страница, собранная одним воркером, отдаётся из общего кэша"""
+        Client().get(reverse('posts:index'))
+        self.assertTrue(any(
+            'feed-page' in key for key in make_worker_cache().client._data
+        ))
+        with self.assertNumQueries(0):
+            Client().get(reverse('posts:index'))
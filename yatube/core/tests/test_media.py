@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+CONTENT = b'0123456789'
+
+
+class MediaServeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        for name in ('posts/image.gif', 'cache/ab/cd/0123abcd.gif'):
+            path = os.path.join(cls.media_root, name)
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+        cls.settings_override = override_settings(
+            MEDIA_ROOT=cls.media_root, MEDIA_ACCEL_REDIRECT='')
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('media', args=['posts/image.gif'])
+
+    def get(self, url=None, **headers):
+        response = self.client.get(url or self.url, **headers)
+        body = b''.join(response.streaming_content) if (
+            response.streaming) else response.content
+        return response, body
+
+    def test_file_response(self):
+        """Файл отдаётся с валидаторами и заголовками кэша"""
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('max-age=86400', response['Cache-Control'])
+
+    def test_thumbnails_are_not_immutable(self):
+        """Миниатюры кэшируются как остальные файлы, без immutable"""
+        response, _ = self.get(
+            reverse('media', args=['cache/ab/cd/0123abcd.gif']))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=86400', response['Cache-Control'])
+
+    def test_conditional_request(self):
+        """Совпавший ETag или дата дают 304 без тела"""
+        response, _ = self.get()
+        etag, modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(
+            self.get(HTTP_IF_NONE_MATCH=etag)[0].status_code, 304)
+        self.assertEqual(
+            self.get(HTTP_IF_MODIFIED_SINCE=modified)[0].status_code, 304)
+
+    def test_range(self):
+        """Один диапазон отдаётся ответом 206"""
+        for header, expected, content_range in (
+            ('bytes=2-5', b'2345', 'bytes 2-5/10'),
+            ('bytes=7-', b'789', 'bytes 7-9/10'),
+            ('bytes=-3', b'789', 'bytes 7-9/10'),
+            ('bytes=8-100', b'89', 'bytes 8-9/10'),
+        ):
+            with self.subTest(header=header):
+                response, body = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, expected)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(
+                    response['Content-Length'], str(len(expected)))
+
+    def test_unsatisfiable_and_stale_ranges(self):
+        """Диапазон за концом файла — 416, устаревший If-Range — весь файл"""
+        response, _ = self.get(HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+        response, body = self.get(
+            HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, CONTENT)
+
+    def test_accel_redirect(self):
+        """С MEDIA_ACCEL_REDIRECT файл отдаёт nginx"""
+        with self.settings(MEDIA_ACCEL_REDIRECT='/protected-media/'):
+            response, body = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/image.gif')
+        self.assertEqual(body, b'')
+        self.assertIn('ETag', response)
+
+    def test_missing_and_outside_files(self):
+        """Несуществующие файлы и пути вне MEDIA_ROOT — 404"""
+        for path in ('posts/missing.gif', '../etc/passwd', 'posts'):
+            with self.subTest(path=path):
+                response = self.client.get(f'/media/{path}')
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post, User
+
+
+@override_settings(METRICS_SAMPLE_RATE=1, METRICS_TOKEN='')
+class MetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.author, text='Текст поста')
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        self.client = Client()
+
+    def test_server_timing_header(self):
+        """Замеренный запрос получает заголовок Server-Timing"""
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('cache;desc="miss"', timing)
+        self.assertIn('total;dur=', timing)
+        response = self.client.get(reverse('posts:index'))
+        self.assertIn('cache;desc="hit"', response['Server-Timing'])
+
+    def test_query_count(self):
+        """Число SQL-запросов совпадает с выполненными"""
+        url = reverse('posts:post_comments', args=[Post.objects.get().pk])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        executed = len(queries)
+        histogram = metrics.registry.histograms[
+            ('db_queries', 'posts:post_comments')]
+        self.assertEqual(histogram.sum, executed)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_counted(self):
+        """Незамеренные запросы только считаются"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(metrics.registry.counters[
+            ('requests_total', 'posts:index')], 1)
+        self.assertEqual(metrics.registry.histograms, {})
+
+    def test_prometheus_output(self):
+        """/metrics/ отдаёт гистограммы по имени view"""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram',
+                      body)
+        self.assertIn('yatube_request_duration_seconds_bucket'
+                      '{view="posts:index",le="+Inf"} 2', body)
+        self.assertIn('yatube_db_queries_count{view="posts:index"} 2', body)
+        self.assertIn('yatube_cache_hits_total{view="posts:index"} 1', body)
+        self.assertNotIn('view="metrics"', body.replace(
+            'yatube_requests_total{view="metrics"}', ''))
+
+    def test_metrics_access(self):
+        """/metrics/ закрыт для внешних адресов и без токена"""
+        response = self.client.get(
+            reverse('metrics'), REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 403)
+        with self.settings(METRICS_TOKEN='secret'):
+            self.assertEqual(
+                self.client.get(reverse('metrics')).status_code, 403)
+            response = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret',
+                REMOTE_ADDR='203.0.113.5')
+            self.assertEqual(response.status_code, 200)
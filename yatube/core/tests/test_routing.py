@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+
+from core import routing
+from posts.models import Post, User
+
+REPLICA = 'replica_1'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def get(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.get(url)
+        return response, len(primary), len(replica)
+
+    def feed_reads(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 1)
+        return [
+            any('posts_post' in query['sql'] for query in queries)
+            for queries in (primary, replica)
+        ]
+
+    def test_feed_reads_go_to_replica(self):
+        """Ленты, которые давно не менялись, собираются с реплики"""
+        cache.clear()
+        self.assertEqual(
+            self.feed_reads(reverse('api:index')), [False, True])
+
+    def test_recently_changed_feed_is_built_from_primary(self):
+        """Только что изменённая лента для кэша собирается с основной базы"""
+        self.assertEqual(
+            self.feed_reads(reverse('api:index')), [True, False])
+
+    def test_replica_views_exist(self):
+        """Все имена из DATABASE_REPLICA_VIEWS разрешаются в адреса"""
+        resolver = get_resolver()
+        for name in settings.DATABASE_REPLICA_VIEWS:
+            with self.subTest(view=name):
+                namespace, view = name.split(':')
+                urls = resolver.namespace_dict[namespace][1].reverse_dict
+                self.assertIn(view, urls)
+                possibility = urls.getlist(view)[0][0][0]
+                reverse(name, kwargs={param: '1' for param in possibility[1]})
+
+    def test_other_views_read_primary(self):
+        """Страницы вне списка читают с основной базы"""
+        _, primary, replica = self.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_client_is_pinned_after_write(self):
+        """После записи клиент читает свои изменения с основной базы"""
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'})
+        self.assertIn(routing.PIN_COOKIE, response.cookies)
+        _, primary, replica = self.get(reverse('posts:index'))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_router_falls_back_to_primary(self):
+        """Запись и транзакция переключают чтение на основную базу"""
+        router = routing.PrimaryReplicaRouter()
+        routing._state.replica_reads = True
+        try:
+            self.assertEqual(router.db_for_read(Post), REPLICA)
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Post), 'default')
+            router.db_for_write(Post)
+            self.assertEqual(router.db_for_read(Post), 'default')
+        finally:
+            routing._state.replica_reads = False
@@ -0,0 +1,76 @@
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import auth, benchmark
+from core.sessions import SYNCED_PREFIX, SessionStore
+from posts.models import User
+
+
+class CachedSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', password='old-password')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        executed = len(queries)
+        self.assertEqual(response.status_code, 200)
+        return executed
+
+    def test_logged_in_request_has_no_auth_queries(self):
+        """Сессия и пользователь вошедшего читателя берутся из кэша"""
+        url = reverse('about:author')
+        self.queries(url)
+        self.assertEqual(self.queries(url), 0)
+        cache.clear()
+        self.assertEqual(self.queries(url), 2)
+
+    def test_write_behind(self):
+        """Изменения данных сессии пишутся в базу не чаще интервала"""
+        session = SessionStore(self.client.session.session_key)
+        session['theme'] = 'dark'
+        session.save()
+        self.assertNotIn('theme', Session.objects.get(
+            session_key=session.session_key).get_decoded())
+        self.assertEqual(
+            SessionStore(session.session_key)['theme'], 'dark')
+        cache.delete(SYNCED_PREFIX + session.session_key)
+        session['theme'] = 'light'
+        session.save()
+        self.assertEqual(Session.objects.get(
+            session_key=session.session_key).get_decoded()['theme'],
+            'light')
+
+    def test_logout_forgets_session_and_user(self):
+        """Выход удаляет сессию из кэша и базы и сбрасывает пользователя"""
+        self.queries(reverse('about:author'))
+        key = self.client.session.session_key
+        self.client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(auth.KEY.format(self.user.pk)))
+        self.assertFalse(Session.objects.filter(session_key=key).exists())
+        self.assertFalse(SessionStore().exists(key))
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля закэшированный пользователь не остаётся"""
+        url = reverse('posts:post_create')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.user.set_password('new-password')
+        self.user.save()
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class SessionBenchmarkTests(TestCase):
+    @override_settings(SESSION_WRITE_BEHIND=60)
+    def test_cache_mode_saves_queries(self):
+        """Кэш сессий и пользователей убирает запросы middleware"""
+        results = benchmark.measure_sessions(iterations=20)
+        self.assertGreaterEqual(results['db']['queries'], 2)
+        self.assertLess(results['cache']['queries'], 0.5)
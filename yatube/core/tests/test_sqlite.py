@@ -0,0 +1,67 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError, transaction
+from django.test import SimpleTestCase, TestCase
+
+from core import sqlite
+
+
+class PragmaTests(TestCase):
+    def test_pragmas_applied_on_connect(self):
+        """Новое соединение SQLite получает WAL и synchronous=NORMAL"""
+        with tempfile.TemporaryDirectory() as directory:
+            conn = sqlite._connect(
+                os.path.join(directory, 'db.sqlite3'), 'tuned')
+            with conn.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'wal')
+                cursor.execute('PRAGMA synchronous')
+                self.assertEqual(cursor.fetchone()[0], 1)
+            conn.close()
+
+
+class RetryTests(SimpleTestCase):
+    def setUp(self):
+        sleep = mock.patch('core.sqlite.time.sleep')
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def test_retries_locked_writes(self):
+        """Запись повторяется, пока база занята"""
+        write = mock.Mock(side_effect=[
+            OperationalError('database is locked'), 'ok'])
+        self.assertEqual(sqlite.retry_on_locked(write)(), 'ok')
+        self.assertEqual(write.call_count, 2)
+
+    def test_gives_up(self):
+        """После последней попытки ошибка пробрасывается"""
+        write = mock.Mock(side_effect=OperationalError('database is locked'))
+        with self.assertRaises(OperationalError):
+            sqlite.retry_on_locked(write, attempts=3)()
+        self.assertEqual(write.call_count, 3)
+
+    def test_no_retry_for_other_errors(self):
+        """Другие ошибки не повторяются"""
+        write = mock.Mock(side_effect=OperationalError('no such table'))
+        with self.assertRaises(OperationalError):
+            sqlite.retry_on_locked(write)()
+        self.assertEqual(write.call_count, 1)
+
+
+class RetryInTransactionTests(TestCase):
+    def test_no_retry_inside_transaction(self):
+        """Внутри транзакции блокировка пробрасывается сразу"""
+        write = mock.Mock(side_effect=OperationalError('database is locked'))
+        with self.assertRaises(OperationalError), transaction.atomic():
+            sqlite.retry_on_locked(write)()
+        self.assertEqual(write.call_count, 1)
+
+
+class StressTests(TestCase):
+    def test_tuned_mode_has_no_lock_errors(self):
+        """С WAL и повторами все параллельные записи проходят"""
+        result = sqlite.stress('tuned', workers=3, writes=30)
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(result['writes'], 90)
@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import checks, tasks
+from core.models import Task
+
+calls = []
+
+
+@tasks.task
+def remember(value):
+    calls.append(value)
+
+
+@tasks.task
+def explode():
+    raise RuntimeError('boom')
+
+
+def shared_caches(test):
+    location = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, location)
+    config = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': location,
+    }
+    return {'default': config, 'post_fragments': config}
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_enqueues_and_worker_runs(self):
+        """delay() ставит задачу в очередь, воркер её выполняет"""
+        remember.delay(value=1)
+        remember.delay(value=2)
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.filter(status=Task.PENDING).count(), 2)
+        with self.settings(CACHES=shared_caches(self)):
+            call_command(
+                'runworker', once=True, stdout=open('/dev/null', 'w'))
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(Task.objects.filter(status=Task.DONE).count(), 2)
+
+    def test_delay_after_waits_for_countdown(self):
+        """delay_after() откладывает задачу на заданное число секунд"""
+        task_obj = remember.delay_after(60, value=4)
+        self.assertEqual(tasks.run_pending(), 0)
+        Task.objects.filter(pk=task_obj.pk).update(
+            run_after=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, [4])
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        """Упавшая задача повторяется, затем помечается ошибкой"""
+        task_obj = explode.delay()
+        for _ in range(tasks.MAX_ATTEMPTS):
+            tasks.run_pending()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.FAILED)
+        self.assertEqual(task_obj.attempts, tasks.MAX_ATTEMPTS)
+        self.assertIn('boom', task_obj.error)
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode(self):
+        """В eager-режиме задача выполняется сразу"""
+        remember.delay(value=3)
+        self.assertEqual(calls, [3])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_ALWAYS_EAGER=False, CACHES={
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        for alias in ('default', 'post_fragments')
+    })
+    def test_worker_requires_shared_cache(self):
+        """Воркер не запускается с кэшем в памяти процесса"""
+        self.assertEqual(
+            [error.id for error in checks.shared_cache(None)], ['core.E001'])
+        with self.assertRaisesMessage(CommandError, 'runworker'):
+            call_command('runworker', once=True)
+        with self.settings(CACHES=shared_caches(self)):
+            self.assertEqual(checks.shared_cache(None), [])
+        with self.settings(TASKS_ALWAYS_EAGER=True):
+            self.assertEqual(checks.shared_cache(None), [])
@@ -1,8 +1,110 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
+from . import search, tasks
+from .constants import ADMIN_EXACT_COUNT_LIMIT, ADMIN_SEARCH_LIMIT
 from .models import Group, Post
 
 
+def estimated_count(model, using='default'):
+    """Примерное число строк таблицы без COUNT(*).
+
+    PostgreSQL берёт оценку планировщика из ``pg_class``, SQLite — самый
+    большой первичный ключ (один шаг по индексу).
+    """
+    conn = connections[using]
+    table = model._meta.db_table
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s', [table])
+        else:
+            cursor.execute('SELECT MAX({}) FROM {}'.format(
+                conn.ops.quote_name(model._meta.pk.column),
+                conn.ops.quote_name(table)))
+        row = cursor.fetchone()
+    return max(int(row[0] or 0), 0) if row else 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator списка в админке: без фильтров большая таблица не
+    пересчитывается, число строк берётся из ``estimated_count``."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate > ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return queryset.count()
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """Автокомплит, которому выбранный объект передаёт форма.
+
+    Обычный ``AutocompleteSelect`` загружает выбранное значение отдельным
+    запросом в каждой строке ``list_editable``.
+    """
+    preloaded = None
+
+    def optgroups(self, name, value, attr=None):
+        obj = self.preloaded
+        if obj is None or [str(v) for v in value] != [str(obj.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name, obj.pk, self.choices.field.label_from_instance(obj),
+            True, len(options)))
+        return [(None, options, 0)]
+
+
+class PostChangeListForm(forms.ModelForm):
+    """Строка списка постов: группа уже загружена
+    ``list_select_related``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        widget = self.fields['group'].widget
+        getattr(widget, 'widget', widget).preloaded = self.instance.group
+
+
+class ModerationActionForm(ActionForm):
+    """Панель действий с выбором группы для переноса постов."""
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа',
+        widget=AutocompleteSelect(
+            Post._meta.get_field('group').remote_field, admin.site))
+
+
+def _enqueue(modeladmin, request, job, message, **kwargs):
+    """Ставит задачу модерации в очередь и сообщает её номер."""
+    task_obj = job.delay(**kwargs)
+    if task_obj is not None:
+        message = f'{message} Задача №{task_obj.pk}.'
+    modeladmin.message_user(request, message)
+
+
+def _target_group(modeladmin, request):
+    try:
+        group = ModerationActionForm.base_fields['group'].clean(
+            request.POST.get('group'))
+    except ValidationError:
+        group = None
+    if group is None:
+        modeladmin.message_user(
+            request, 'Выберите группу для переноса.', messages.ERROR)
+    return group
+
+
 class PostAdmin(admin.ModelAdmin):
     list_display = (
         'pk',
@@ -13,9 +115,65 @@ class PostAdmin(admin.ModelAdmin):
     )
 
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = ModerationActionForm
+    actions = ('delete_in_background', 'move_to_group', 'purge_authors')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.autocomplete_fields:
+            kwargs.setdefault('widget', PreloadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using')))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', PostChangeListForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def delete_in_background(self, request, queryset):
+        ids = list(queryset.values_list('pk', flat=True))
+        _enqueue(self, request, tasks.delete_posts,
+                 f'Удаление постов ({len(ids)}) поставлено в очередь.',
+                 post_ids=ids)
+    delete_in_background.allowed_permissions = ('delete',)
+    delete_in_background.short_description = 'Удалить в фоне'
+
+    def move_to_group(self, request, queryset):
+        group = _target_group(self, request)
+        if group is None:
+            return
+        ids = list(queryset.values_list('pk', flat=True))
+        _enqueue(self, request, tasks.move_posts,
+                 f'Перенос постов ({len(ids)}) в «{group}» поставлен в '
+                 f'очередь.', post_ids=ids, group_id=group.pk)
+    move_to_group.allowed_permissions = ('change',)
+    move_to_group.short_description = 'Перенести в группу'
+
+    def purge_authors(self, request, queryset):
+        ids = list(queryset.order_by().values_list(
+            'author_id', flat=True).distinct())
+        _enqueue(self, request, tasks.purge_authors,
+                 f'Блокировка авторов ({len(ids)}) и удаление их постов, '
+                 f'комментариев и подписок поставлены в очередь.',
+                 author_ids=ids)
+    purge_authors.allowed_permissions = ('delete',)
+    purge_authors.short_description = 'Заблокировать авторов и удалить всё'
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по индексу FTS5, если он есть, иначе LIKE по тексту."""
+        results = search.search(search_term)
+        if not isinstance(results, search.SearchResults):
+            return super().get_search_results(
+                request, queryset, search_term)
+        ids = results.ids(ADMIN_SEARCH_LIMIT)
+        return queryset.filter(pk__in=ids), False
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -25,9 +183,30 @@ class GroupAdmin(admin.ModelAdmin):
         'slug',
         'description',
     )
-    search_fields = ('description',)
+    search_fields = ('title', 'description')
     list_filter = ('title',)
     empty_value_display = '-пусто-'
+    action_form = ModerationActionForm
+    actions = ('delete_posts', 'move_posts')
+
+    def delete_posts(self, request, queryset):
+        ids = list(queryset.values_list('pk', flat=True))
+        _enqueue(self, request, tasks.delete_group_posts,
+                 'Удаление постов групп поставлено в очередь.',
+                 group_ids=ids)
+    delete_posts.allowed_permissions = ('delete',)
+    delete_posts.short_description = 'Удалить посты групп в фоне'
+
+    def move_posts(self, request, queryset):
+        group = _target_group(self, request)
+        if group is None:
+            return
+        ids = list(queryset.exclude(pk=group.pk).values_list('pk', flat=True))
+        _enqueue(self, request, tasks.move_group_posts,
+                 f'Перенос постов групп в «{group}» поставлен в очередь.',
+                 group_ids=ids, group_id=group.pk)
+    move_posts.allowed_permissions = ('change',)
+    move_posts.short_description = 'Перенести посты в группу'
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,164 @@
+"""JSON API лент (``/api/v1/``).
+
+Выборки и пагинация те же, что у HTML-страниц. ETag — ключ страницы
+``feed_cache.page_key`` (версии областей, адрес и пользователь), это одно
+обращение к кэшу. Если клиент прислал совпадающий ``If-None-Match``,
+ответ 304 отдаётся до выборки постов. Last-Modified не отдаётся:
+удаления, правки и отписки не сдвигают дату последнего поста, а версии
+областей её не заменяют.
+
+Число комментариев есть только в ответе поста: комментарий увеличивает
+версию лишь области поста, и ленты с ним устаревали бы.
+"""
+from functools import wraps
+
+from django.contrib.auth.models import User
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import condition, require_safe
+
+from . import counters, feed_cache, timeline
+from .constants import CURSOR_PARAM
+from .models import Group, Post
+from .utils import show_paginator
+
+
+def post_data(request, post):
+    return {
+        'id': post.pk,
+        'url': request.build_absolute_uri(
+            reverse('api:post_detail', args=[post.pk])),
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': {
+            'username': post.author.username,
+            'full_name': post.author.get_full_name(),
+        },
+        'group': post.group and {
+            'slug': post.group.slug,
+            'title': post.group.title,
+        },
+        'image': post.image.url if post.image else None,
+    }
+
+
+def _page_url(request, param, value):
+    query = request.GET.copy()
+    query.pop('page', None)
+    query.pop(CURSOR_PARAM, None)
+    query[param] = value
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def page_data(request, page):
+    if getattr(page, 'cursor_mode', False):
+        next_url = page.next_cursor and _page_url(
+            request, CURSOR_PARAM, page.next_cursor)
+        previous_url = page.previous_cursor and _page_url(
+            request, CURSOR_PARAM, page.previous_cursor)
+        count = None
+    else:
+        next_url = page.has_next() and _page_url(
+            request, 'page', page.next_page_number())
+        previous_url = page.has_previous() and _page_url(
+            request, 'page', page.previous_page_number())
+        count = page.paginator.count
+    return {
+        'count': count,
+        'next': next_url or None,
+        'previous': previous_url or None,
+        'results': [post_data(request, post) for post in page],
+    }
+
+
+def _etag(request, scopes):
+    return feed_cache.page_key(request, scopes)
+
+
+def _feed_response(request, scopes, posts):
+    def build():
+        return JsonResponse(page_data(request, show_paginator(request, posts)))
+    return feed_cache.cached_response(request, scopes, build)
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Требуется авторизация'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _group_id(slug):
+    return get_object_or_404(Group.objects.only('pk'), slug=slug).pk
+
+
+def _author_id(username):
+    return get_object_or_404(User.objects.only('pk'), username=username).pk
+
+
+@require_safe
+@condition(etag_func=lambda request: _etag(request, [('posts',)]))
+def index(request):
+    return _feed_response(request, [('posts',)], Post.objects.for_feed())
+
+
+@require_safe
+@condition(
+    etag_func=lambda request, slug: _etag(
+        request, [('group', _group_id(slug))]),
+)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _feed_response(
+        request, [('group', group.pk)], group.posts.for_feed())
+
+
+@require_safe
+@condition(
+    etag_func=lambda request, username: _etag(
+        request, [('author', _author_id(username))]),
+)
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return _feed_response(
+        request, [('author', author.pk)], author.posts.for_feed())
+
+
+@require_safe
+@api_login_required
+@condition(
+    etag_func=lambda request: _etag(
+        request, [('posts',), ('follows', request.user.pk)]),
+)
+def follow_index(request):
+    posts = timeline.feed_for(request.user)
+    return JsonResponse(page_data(request, show_paginator(request, posts)))
+
+
+def _post_scopes(post_id):
+    author_id = get_object_or_404(
+        Post.objects.values_list('author_id', flat=True), pk=post_id)
+    return [('post', post_id), ('author', author_id)]
+
+
+@require_safe
+@condition(
+    etag_func=lambda request, post_id: _etag(request, _post_scopes(post_id)),
+)
+def post_detail(request, post_id):
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
+
+    def build():
+        data = post_data(request, post)
+        data['comments_count'] = post.comments_count
+        data['author']['posts_count'] = counters.for_user(
+            post.author_id).posts_count
+        data['comments_url'] = request.build_absolute_uri(
+            reverse('posts:post_comments', args=[post.pk]) + '?format=json')
+        return JsonResponse(data)
+    return feed_cache.cached_response(
+        request, [('post', post.pk), ('author', post.author_id)], build)
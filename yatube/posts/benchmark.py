@@ -0,0 +1,345 @@
+"""Синтетические данные и замеры страниц из ``posts/urls.py``.
+
+``seed`` генерирует пользователей, группы, посты, комментарии и подписки
+и загружает их через ``transfer.Importer``. Популярность авторов
+распределена по степенному закону (Ципф с показателем ``alpha``): немногие
+авторы собирают большую часть подписчиков, постов и комментариев, как в
+настоящей соцсети. При одинаковом ``seed`` данные одинаковые.
+
+``measure`` прогоняет каждую страницу тестовым клиентом и считает
+перцентили задержки, число SQL-запросов и выделенную память
+(tracemalloc). Запросы и память снимаются отдельным проходом, чтобы
+инструментирование не искажало задержки. Замеры идут при ``DEBUG = False``
+(без debug toolbar и журнала запросов), а каждый запрос выполняется в
+транзакции с откатом, так что замеры не меняют данные.
+
+``measure_templates`` замеряет только рендер шаблонов лент (посты
+выбраны заранее) в трёх режимах: без кэша загрузчика, с
+``cached.Loader`` и с ним же плюс кэш фрагментов карточек постов.
+"""
+import itertools
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+
+from . import timeline, transfer, urls
+from .models import Comment, Follow, Group, Post, User
+from .utils import show_paginator
+
+POST_VIEWS = {'add_comment': {'text': 'Комментарий из бенчмарка'}}
+PERCENTILES = (50, 90, 99)
+RENDER_MODES = {
+    'uncached': {'cached_loader': False, 'fragments': False},
+    'loader': {'cached_loader': True, 'fragments': False},
+    'fragments': {'cached_loader': True, 'fragments': True},
+}
+
+
+def _zipf_weights(count, alpha):
+    return list(itertools.accumulate(
+        1 / rank ** alpha for rank in range(1, count + 1)))
+
+
+def _follow_records(rng, usernames, popular, weights, follows_per_user):
+    for username in usernames:
+        wanted = min(len(usernames) - 1, max(
+            0, round(rng.expovariate(1 / follows_per_user))))
+        authors = set()
+        for _ in range(wanted * 3):
+            if len(authors) >= wanted:
+                break
+            author = rng.choices(popular, cum_weights=weights)[0]
+            if author != username:
+                authors.add(author)
+        for author in authors:
+            yield {'model': 'follow', 'user': username, 'author': author}
+
+
+def seed_records(users, groups, posts, comments, follows_per_user,
+                 alpha=1.1, seed=0, prefix='user', until=None):
+    """Записи для ``transfer.Importer``; генерируются лениво.
+
+    Посты датируются годом до ``until`` (по умолчанию — до текущего
+    момента).
+    """
+    rng = random.Random(seed)
+    Faker.seed(seed)
+    fake = Faker('ru_RU')
+    usernames = [f'{prefix}{number}' for number in range(users)]
+    for username in usernames:
+        yield {
+            'model': 'user',
+            'username': username,
+            'first_name': fake.first_name(),
+            'last_name': fake.last_name(),
+        }
+    slugs = [f'{prefix}-group-{number}' for number in range(groups)]
+    for slug in slugs:
+        yield {
+            'model': 'group',
+            'slug': slug,
+            'title': fake.sentence(nb_words=3)[:200],
+            'description': fake.paragraph()[:500],
+        }
+    popular = usernames[:]
+    rng.shuffle(popular)
+    weights = _zipf_weights(users, alpha)
+    until = until or timezone.now()
+    for number in range(1, posts + 1):
+        yield {
+            'model': 'post',
+            'id': number,
+            'author': rng.choices(popular, cum_weights=weights)[0],
+            'group': rng.choice(slugs) if slugs and rng.random() < .7 else '',
+            'text': fake.paragraph(nb_sentences=rng.randint(1, 8)),
+            'pub_date': (until - timedelta(
+                seconds=rng.randint(0, 365 * 24 * 3600))).isoformat(),
+        }
+    if posts:
+        post_weights = _zipf_weights(posts, alpha)
+        post_ids = list(range(1, posts + 1))
+        rng.shuffle(post_ids)
+        for _ in range(comments):
+            yield {
+                'model': 'comment',
+                'post': rng.choices(post_ids, cum_weights=post_weights)[0],
+                'author': rng.choice(usernames),
+                'text': fake.sentence(),
+            }
+    yield from _follow_records(
+        rng, usernames, popular, weights, follows_per_user)
+
+
+def seed(batch_size=2000, progress=None, **options):
+    importer = transfer.Importer(batch_size, progress=progress)
+    for record in seed_records(**options):
+        importer.add(record)
+    importer.finish()
+    return importer
+
+
+def _samples():
+    """Пользователь-читатель и объекты для аргументов адресов."""
+    reader = User.objects.annotate(
+        follows=Count('follower')).order_by('-follows', 'pk').first()
+    author = User.objects.annotate(
+        followers=Count('following')).order_by('-followers', 'pk').first()
+    post = Post.objects.order_by('-comments_count', 'pk').first()
+    group = Group.objects.annotate(
+        total=Count('posts')).order_by('-total', 'pk').first()
+    kwargs = {
+        'slug': group and group.slug,
+        'username': author and author.username,
+        'post_id': post and post.pk,
+    }
+    return reader, kwargs
+
+
+def targets():
+    """Имя и адрес каждой страницы из ``posts/urls.py``."""
+    reader, kwargs = _samples()
+    found = {}
+    for pattern in urls.urlpatterns:
+        names = pattern.pattern.converters.keys()
+        if any(kwargs.get(name) is None for name in names):
+            continue
+        found[pattern.name] = reverse(
+            f'{urls.app_name}:{pattern.name}',
+            kwargs={name: kwargs[name] for name in names})
+    return reader, found
+
+
+def _request(client, name, url):
+    with transaction.atomic():
+        if name in POST_VIEWS:
+            response = client.post(url, POST_VIEWS[name])
+        else:
+            response = client.get(url)
+        transaction.set_rollback(True)
+    return response
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def measure_url(client, name, url, iterations, warmup=2, cold=False):
+    for _ in range(warmup):
+        _request(client, name, url)
+    timings = []
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        started = time.perf_counter()
+        response = _request(client, name, url)
+        timings.append((time.perf_counter() - started) * 1000)
+    if cold:
+        cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        _request(client, name, url)
+    # Журнал запросов сбрасывается в начале следующего запроса.
+    query_count = len(queries)
+    if cold:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        _request(client, name, url)
+        allocated, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result = {
+        'url': url,
+        'status': response.status_code,
+        'iterations': iterations,
+        'mean_ms': round(statistics.mean(timings), 3),
+        'queries': query_count,
+        'allocated_kb': round(allocated / 1024, 1),
+        'peak_kb': round(peak / 1024, 1),
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(_percentile(timings, percent), 3)
+    return result
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@override_settings(DEBUG=False)
+def measure(iterations=50, warmup=2, cold=False, only=None):
+    reader, found = targets()
+    client = Client()
+    if reader is not None:
+        client.force_login(reader)
+    results = {
+        name: measure_url(client, name, url, iterations, warmup, cold)
+        for name, url in found.items()
+        if not only or name in only
+    }
+    return {
+        'meta': {
+            'commit': _commit(),
+            'created': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'cache': cache.__class__.__name__,
+            'cold': cold,
+            'rows': {
+                model.__name__: model.objects.count()
+                for model in (User, Group, Post, Comment, Follow)
+            },
+        },
+        'results': results,
+    }
+
+
+def _templates(cached_loader):
+    loaders = settings.TEMPLATE_LOADERS
+    if cached_loader:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    templates = []
+    for engine in settings.TEMPLATES:
+        options = dict(engine.get('OPTIONS', {}), loaders=loaders)
+        templates.append(dict(engine, APP_DIRS=False, OPTIONS=options))
+    return templates
+
+
+def _caches(fragments):
+    caches = dict(settings.CACHES)
+    if not fragments:
+        caches['post_fragments'] = {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    return caches
+
+
+def _feed_page(request, posts):
+    """Страница ленты, уже загруженная из базы."""
+    page = show_paginator(request, posts)
+    page.object_list = list(page.object_list)
+    if not getattr(page, 'cursor_mode', False):
+        page.paginator.count  # COUNT(*) выполняется до замера
+    return page
+
+
+def feed_pages():
+    """Запрос и (шаблон, контекст) страниц лент для рендера."""
+    reader, kwargs = _samples()
+    request = RequestFactory().get('/')
+    request.user = reader or AnonymousUser()
+    pages = {'index': ('posts/index.html', {
+        'page_obj': _feed_page(request, Post.objects.for_feed())})}
+    if kwargs['slug']:
+        group = Group.objects.get(slug=kwargs['slug'])
+        pages['group_list'] = ('posts/group_list.html', {
+            'group': group,
+            'page_obj': _feed_page(request, group.posts.for_feed()),
+        })
+    if kwargs['username']:
+        author = User.objects.get(username=kwargs['username'])
+        pages['profile'] = ('posts/profile.html', {
+            'author': author,
+            'following': False,
+            'total_posts': author.posts.count(),
+            'page_obj': _feed_page(request, author.posts.for_feed()),
+        })
+    if reader is not None:
+        pages['follow_index'] = ('posts/follow.html', {
+            'page_obj': _feed_page(request, timeline.feed_for(reader)),
+        })
+    return request, pages
+
+
+def measure_templates(iterations=50):
+    """Среднее время рендера каждой страницы в каждом режиме, мс."""
+    request, pages = feed_pages()
+    results = {name: {} for name in pages}
+    for mode, options in RENDER_MODES.items():
+        with override_settings(
+                DEBUG=False,
+                TEMPLATES=_templates(options['cached_loader']),
+                CACHES=_caches(options['fragments'])):
+            for name, (template, context) in pages.items():
+                render_to_string(template, context, request)
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    render_to_string(template, context, request)
+                results[name][mode] = round(
+                    (time.perf_counter() - started) * 1000 / iterations, 3)
+    return results
+
+
+def compare(before, after, metric='p50_ms'):
+    """Строки (страница, было, стало, изменение в %) по метрике."""
+    rows = []
+    for name, result in after['results'].items():
+        old = before['results'].get(name, {}).get(metric)
+        new = result[metric]
+        change = None if not old else (new - old) / old * 100
+        rows.append((name, old, new, change))
+    return rows
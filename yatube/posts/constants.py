@@ -1,2 +1,41 @@
 POST_PER_PAGE = 10
+PAGE_LINKS_RADIUS = 3
 PREVIEW_TEXT_LENGTH = 150
+CURSOR_PARAM = 'cursor'
+FANOUT_FOLLOWER_LIMIT = 5000
+TIMELINE_BATCH_SIZE = 1000
+TIMELINE_BACKFILL_LIMIT = POST_PER_PAGE * 5
+COUNTERS_BATCH_SIZE = 1000
+FEED_CACHE_TIMEOUT = 60 * 15
+FEED_CACHE_LOCK_TIMEOUT = 10
+FEED_CACHE_WAIT = 2
+FEED_CACHE_BETA = 1.0
+POST_THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 24_000_000
+IMAGE_MAX_SIDE = 1920
+IMAGE_FORMATS = ('WEBP', 'AVIF')
+IMAGE_SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 4},
+    'AVIF': {'quality': 60, 'speed': 8},
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+}
+SEARCH_BATCH_SIZE = 500
+SEARCH_REINDEX_TIMEOUT = 5 * 60
+COMMENTS_PER_PAGE = 20
+COMMENTS_CURSOR_PARAM = 'after'
+FOLLOWS_PER_PAGE = 50
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_WINDOW = 3 * 24 * 60 * 60
+TRENDING_SIZE = 100
+TRENDING_CANDIDATES = 1000
+TRENDING_INTERVAL = 60
+TRENDING_BATCH_SIZE = 1000
+TRENDING_COMMENT_WEIGHT = 1.0
+TRENDING_REACH_WEIGHT = 1.0
+ADMIN_EXACT_COUNT_LIMIT = 10000
+ADMIN_SEARCH_LIMIT = 1000
+MODERATION_BATCH_SIZE = 500
@@ -0,0 +1,92 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются выражениями ``F()`` в транзакции записи, поэтому
+параллельные запросы не теряют инкременты. Если строки счётчиков ещё нет,
+она создаётся пересчётом по исходным таблицам.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .constants import COUNTERS_BATCH_SIZE
+from .models import AuthorStats, Comment, Follow, Post, User
+
+
+def _recount(user_id):
+    return {
+        'posts_count': Post.objects.filter(author_id=user_id).count(),
+        'followers_count': Follow.objects.filter(author_id=user_id).count(),
+        'following_count': Follow.objects.filter(user_id=user_id).count(),
+    }
+
+
+def for_user(user_id):
+    """Счётчики пользователя; при отсутствии строки она пересчитывается."""
+    try:
+        return AuthorStats.objects.get(user_id=user_id)
+    except AuthorStats.DoesNotExist:
+        pass
+    try:
+        with transaction.atomic():
+            return AuthorStats.objects.create(
+                user_id=user_id, **_recount(user_id))
+    except IntegrityError:
+        return AuthorStats.objects.get(user_id=user_id)
+
+
+def bump_user(user_id, **deltas):
+    updated = AuthorStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    if not updated and User.objects.filter(pk=user_id).exists():
+        for_user(user_id)
+
+
+def bump_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta)
+
+
+def _comments_count():
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+        'post').annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(comments), 0)
+
+
+def recount_comments(post_ids):
+    """Пересчитывает число комментариев постов, например после
+    массового удаления."""
+    Post.objects.filter(pk__in=post_ids).update(
+        comments_count=_comments_count())
+
+
+def rebuild():
+    """Полный пересчёт всех счётчиков агрегирующими запросами."""
+    posts = dict(
+        Post.objects.order_by().values('author').annotate(
+            n=Count('pk')).values_list('author', 'n')
+    )
+    followers = dict(
+        Follow.objects.values('author').annotate(
+            n=Count('pk')).values_list('author', 'n')
+    )
+    following = dict(
+        Follow.objects.values('user').annotate(
+            n=Count('pk')).values_list('user', 'n')
+    )
+    with transaction.atomic():
+        Post.objects.update(comments_count=_comments_count())
+        AuthorStats.objects.all().delete()
+        user_ids = User.objects.values_list('pk', flat=True)
+        batch = []
+        for user_id in user_ids.iterator(chunk_size=COUNTERS_BATCH_SIZE):
+            batch.append(AuthorStats(
+                user_id=user_id,
+                posts_count=posts.get(user_id, 0),
+                followers_count=followers.get(user_id, 0),
+                following_count=following.get(user_id, 0),
+            ))
+            if len(batch) >= COUNTERS_BATCH_SIZE:
+                AuthorStats.objects.bulk_create(batch)
+                batch = []
+        AuthorStats.objects.bulk_create(batch)
@@ -0,0 +1,190 @@
+"""Кэш страниц лент с версионными ключами.
+
+Ключ страницы содержит версии «областей» (вся лента, группа, автор, пост),
+от которых зависит её содержимое. Сигналы записи увеличивают версии
+затронутых областей, поэтому запись в кэше может жить долго и при этом не
+отдаёт устаревших данных: после изменения просто перестаёт совпадать ключ.
+
+От лавины одновременных пересчётов защищают две вещи: досрочный
+вероятностный пересчёт (XFetch) незадолго до истечения записи и блокировка,
+при которой страницу пересчитывает только один запрос, а остальные отдают
+прежнюю копию или ждут готовую.
+"""
+import hashlib
+import math
+import random
+import time
+
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+from core import metrics
+from core.routing import primary_reads, replica_reads_allowed
+
+from .constants import (FEED_CACHE_BETA, FEED_CACHE_LOCK_TIMEOUT,
+                        FEED_CACHE_TIMEOUT, FEED_CACHE_WAIT)
+
+VERSION_KEY = 'feed-version:{}'
+PAGE_KEY = 'feed-page:{}'
+LOCK_KEY = 'feed-lock:{}'
+BUMPED_KEY = 'feed-bumped:{}'
+ALL_SCOPE = ('all',)
+WAIT_STEP = 0.05
+
+
+def _scope_name(scope):
+    return ':'.join(str(part) for part in scope)
+
+
+def _new_version():
+    return int(time.time() * 1000)
+
+
+def versions(scopes):
+    keys = [VERSION_KEY.format(_scope_name(scope)) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_version(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def _bump_now(scopes):
+    for scope in scopes:
+        key = VERSION_KEY.format(_scope_name(scope))
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+    cache.set_many(
+        {BUMPED_KEY.format(_scope_name(scope)): 1 for scope in scopes},
+        settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def recently_bumped(scopes):
+    """Менялась ли какая-то из областей за последние
+    ``DATABASE_REPLICA_PIN_SECONDS``: реплика могла ещё не догнать запись.
+    """
+    return bool(cache.get_many([
+        BUMPED_KEY.format(_scope_name(scope))
+        for scope in (ALL_SCOPE, *scopes)
+    ]))
+
+
+def bump(*scopes):
+    """Инвалидирует страницы, зависящие от ``scopes``.
+
+    Версии увеличиваются сразу и ещё раз после фиксации транзакции: второй
+    раз закрывает гонку, в которой параллельный запрос успел положить в
+    кэш страницу, собранную до коммита.
+    """
+    _bump_now(scopes)
+    transaction.on_commit(lambda: _bump_now(scopes))
+
+
+def invalidate_post(post, old_group_id=None):
+    """Сбрасывает все страницы, на которых виден пост."""
+    scopes = [('posts',), ('post', post.pk), ('author', post.author_id)]
+    for group_id in {post.group_id, old_group_id} - {None}:
+        scopes.append(('group', group_id))
+    bump(*scopes)
+
+
+def invalidate_all():
+    """Сбрасывает все страницы, например после массового импорта."""
+    bump(ALL_SCOPE)
+
+
+def fingerprint(scopes):
+    """Версии ``scopes`` и общей области ``ALL_SCOPE`` одной строкой."""
+    scopes = [ALL_SCOPE, *scopes]
+    return '|'.join(
+        f'{_scope_name(scope)}={version}'
+        for scope, version in zip(scopes, versions(scopes)))
+
+
+def page_key(request, scopes):
+    user = request.user
+    auth_state = f'user:{user.pk}' if user.is_authenticated else 'anon'
+    raw = '|'.join([
+        request.resolver_match.view_name if request.resolver_match else '',
+        request.get_full_path(),
+        auth_state,
+        fingerprint(scopes),
+    ])
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _is_fresh(entry):
+    expires, delta = entry['expires'], entry['delta']
+    early = delta * FEED_CACHE_BETA * math.log(1 - random.random())
+    return time.time() - early < expires
+
+
+def _from_entry(entry):
+    return HttpResponse(
+        entry['content'],
+        content_type=entry['content_type'],
+        status=entry['status'],
+    )
+
+
+def _wait_for(key):
+    deadline = time.time() + FEED_CACHE_WAIT
+    while time.time() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def cached_response(request, scopes, build):
+    """Отдаёт страницу из кэша или собирает её вызовом ``build()``.
+
+    Страницы с CSRF-токеном (формы для авторизованных) не кэшируются.
+    Страница собирается с реплики, если её области не менялись последние
+    ``DATABASE_REPLICA_PIN_SECONDS``; иначе — по основной базе, чтобы
+    отстающая реплика не положила в кэш старые данные под новыми версиями.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return build()
+    digest = page_key(request, scopes)
+    key = PAGE_KEY.format(digest)
+    lock = LOCK_KEY.format(digest)
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry):
+        metrics.record_cache(hit=True)
+        return _from_entry(entry)
+    locked = cache.add(lock, 1, FEED_CACHE_LOCK_TIMEOUT)
+    if not locked:
+        if entry is None:
+            entry = _wait_for(key)
+        if entry is not None:
+            metrics.record_cache(hit=True)
+            return _from_entry(entry)
+    metrics.record_cache(hit=False)
+    try:
+        started = time.time()
+        pinned = replica_reads_allowed() and recently_bumped(scopes)
+        with primary_reads() if pinned else nullcontext():
+            response = build()
+        delta = time.time() - started
+        if (response.status_code == 200
+                and not request.META.get('CSRF_COOKIE_USED')):
+            cache.set(key, {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'status': response.status_code,
+                'expires': time.time() + FEED_CACHE_TIMEOUT,
+                'delta': delta,
+            }, FEED_CACHE_TIMEOUT + FEED_CACHE_LOCK_TIMEOUT)
+        return response
+    finally:
+        if locked:
+            cache.delete(lock)
@@ -0,0 +1,75 @@
+"""Граф подписок с кэшем множеств авторов.
+
+Для каждого читателя в кэше лежит ``frozenset`` id авторов, на которых он
+подписан, поэтому ``is_following`` и ``following_ids`` — одно обращение к
+кэшу и проверка за O(1). Множество загружается из базы при первом
+обращении (``cache.add``, чтобы не затереть более свежую запись) и
+перезаписывается из базы сигналами подписки после фиксации транзакции.
+До фиксации ключ удаляется, чтобы тот же запрос сразу увидел свою
+подписку.
+
+Списки подписчиков и подписок листаются курсором по (created, id).
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from .constants import FOLLOWS_PER_PAGE
+from .models import Follow
+from .utils import CursorPaginator
+
+KEY = 'follow-graph:{}'
+
+
+def _load(user_id):
+    return frozenset(Follow.objects.filter(
+        user_id=user_id).values_list('author_id', flat=True))
+
+
+def following_ids(user_id):
+    """Id авторов, на которых подписан читатель."""
+    key = KEY.format(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = _load(user_id)
+        cache.add(key, ids, None)
+    return ids
+
+
+def is_following(user, author_id):
+    if not user.is_authenticated:
+        return False
+    return author_id in following_ids(user.pk)
+
+
+def refresh(user_id):
+    cache.set(KEY.format(user_id), _load(user_id), None)
+
+
+def changed(user_id):
+    """Обновляет множество читателя после изменения его подписок."""
+    cache.delete(KEY.format(user_id))
+    transaction.on_commit(lambda: refresh(user_id))
+
+
+def forget(user_ids):
+    """Сбрасывает множества читателей, например после импорта."""
+    cache.delete_many([KEY.format(user_id) for user_id in user_ids])
+
+
+def _page(follows, cursor):
+    paginator = CursorPaginator(
+        follows.order_by('-created', '-pk'), FOLLOWS_PER_PAGE,
+        field='created')
+    return paginator.get_cursor_page(cursor)
+
+
+def followers_page(author_id, cursor=None):
+    """Подписчики автора, новые сначала."""
+    return _page(Follow.objects.filter(
+        author_id=author_id).select_related('user'), cursor)
+
+
+def following_page(user_id, cursor=None):
+    """Авторы, на которых подписан читатель, новые подписки сначала."""
+    return _page(Follow.objects.filter(
+        user_id=user_id).select_related('author'), cursor)
@@ -1,5 +1,9 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
 
+from . import uploads
+from .constants import IMAGE_MAX_PIXELS, IMAGE_MAX_UPLOAD_SIZE
 from .models import Post, Comment
 
 
@@ -16,6 +20,28 @@ class PostForm(forms.ModelForm):
             'text': 'Введите текст вашего поста',
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Обрезанный при загрузке файл не отдаём Pillow на проверку.
+        self.image_oversized = False
+        image = self.files.get('image')
+        if image is not None and uploads.is_oversized(image):
+            self.files = self.files.copy()
+            del self.files['image']
+            self.image_oversized = True
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if self.image_oversized:
+            raise forms.ValidationError(
+                'Файл больше %s' % filesizeformat(IMAGE_MAX_UPLOAD_SIZE))
+        if not isinstance(image, UploadedFile):
+            return image
+        if uploads.too_many_pixels(image.image):
+            raise forms.ValidationError(
+                'Изображение больше %d Мпикс' % (IMAGE_MAX_PIXELS // 10**6))
+        return uploads.reencode(image)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
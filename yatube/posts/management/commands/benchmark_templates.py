@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время рендера шаблонов лент без кэша загрузчика, '
+        'с cached.Loader и с кэшем фрагментов постов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if not Post.objects.exists():
+            raise CommandError('Нет постов для замера: база пуста?')
+        results = benchmark.measure_templates(options['iterations'])
+        modes = list(benchmark.RENDER_MODES)
+        self.stdout.write(
+            f'{"страница":<16}'
+            + ''.join(f'{mode + ", мс":>16}' for mode in modes)
+            + f'{"выигрыш":>10}')
+        for name, timings in results.items():
+            base, best = timings[modes[0]], timings[modes[-1]]
+            self.stdout.write(
+                f'{name:<16}'
+                + ''.join(f'{timings[mode]:>16.3f}' for mode in modes)
+                + f'{(base - best) / base * 100:>9.0f}%')
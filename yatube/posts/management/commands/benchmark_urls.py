@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки, число запросов и память страниц posts/urls.py '
+        'и сохраняет результат в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом')
+        parser.add_argument(
+            '--only', nargs='+', help='Имена страниц, например index')
+        parser.add_argument(
+            '--output', help='Куда сохранить результат (JSON)')
+        parser.add_argument(
+            '--compare', help='JSON предыдущего прогона для сравнения')
+
+    def handle(self, *args, **options):
+        report = benchmark.measure(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            cold=options['cold'],
+            only=options['only'],
+        )
+        if not report['results']:
+            raise CommandError('Нет страниц для замера: база пуста?')
+        self.stdout.write(
+            f'{"страница":<20}{"p50":>9}{"p90":>9}{"p99":>9}'
+            f'{"запросы":>9}{"пик, КБ":>10}')
+        for name, result in report['results'].items():
+            self.stdout.write(
+                f'{name:<20}{result["p50_ms"]:>9.2f}{result["p90_ms"]:>9.2f}'
+                f'{result["p99_ms"]:>9.2f}{result["queries"]:>9}'
+                f'{result["peak_kb"]:>10.1f}')
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as source:
+                before = json.load(source)
+            self.stdout.write(f'\nСравнение p50 с {options["compare"]}:')
+            for name, old, new, change in benchmark.compare(before, report):
+                if change is None:
+                    self.stdout.write(f'{name:<20} новая страница')
+                    continue
+                line = f'{name:<20}{old:>9.2f} -> {new:>9.2f} ({change:+.1f}%)'
+                style = (self.style.ERROR if change > 10
+                         else self.style.SUCCESS if change < -10
+                         else str)
+                self.stdout.write(style(line))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as out:
+                json.dump(report, out, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результат сохранён в {options["output"]}'))
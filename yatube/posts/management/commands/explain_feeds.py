@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts import timeline
+from posts.constants import POST_PER_PAGE
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+INDEXED_MODELS = (Post, Comment, Follow, TimelineEntry)
+
+
+def feed_queries():
+    """Запросы лент из posts/views.py на первой странице."""
+    user = User.objects.order_by('pk').first()
+    group = Group.objects.order_by('pk').first()
+    post = Post.objects.order_by('pk').first()
+    user_id = user.pk if user else 0
+    feed = Post.objects.for_feed().order_by('-pub_date', '-pk')
+    return {
+        'index': feed,
+        'group_list': feed.filter(group_id=group.pk if group else 0),
+        'profile': feed.filter(author_id=user_id),
+        'follow_index': timeline.timeline_posts(user_id),
+        'comments': Comment.objects.filter(
+            post_id=post.pk if post else 0).order_by('created', 'pk'),
+        'is_following': Follow.objects.filter(
+            user_id=user_id, author_id=user_id),
+    }
+
+
+def explain(queries):
+    return {
+        name: queryset[:POST_PER_PAGE].explain()
+        for name, queryset in queries.items()
+    }
+
+
+def explain_without_indexes(queries):
+    """Планы тех же запросов без составных индексов.
+
+    Индексы удаляются внутри транзакции, которая затем откатывается. Это
+    безопасно только на SQLite: PostgreSQL держал бы эксклюзивные блокировки
+    таблиц до отката, а MySQL фиксирует DDL сразу. На других СУБД
+    возвращается None.
+    """
+    if connection.vendor != 'sqlite':
+        return None
+    with transaction.atomic():
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    cursor.execute(str(index.remove_sql(model, editor)))
+        plans = explain(queries)
+        transaction.set_rollback(True)
+    return plans
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает EXPLAIN-планы запросов лент с индексами и без них '
+        '(без индексов — только на SQLite)')
+
+    def handle(self, *args, **options):
+        queries = feed_queries()
+        before = explain_without_indexes(queries)
+        after = explain(queries)
+        if before is None:
+            self.stderr.write(
+                'Планы без индексов строятся только на SQLite: на других '
+                'СУБД удаление индексов блокирует или меняет рабочую базу.')
+        for name in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            if before is not None:
+                self.stdout.write('  без индексов:')
+                self.stdout.write(self._indent(before[name]))
+            self.stdout.write('  с индексами:')
+            self.stdout.write(self._indent(after[name]))
+
+    @staticmethod
+    def _indent(plan):
+        return '\n'.join(f'    {line}' for line in plan.splitlines())
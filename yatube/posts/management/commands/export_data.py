@@ -0,0 +1,73 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Выгружает пользователей, группы, посты, комментарии и подписки'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл JSONL («-» — stdout) или каталог для CSV')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default='jsonl')
+        parser.add_argument(
+            '--models', nargs='+', choices=transfer.MODELS,
+            default=transfer.MODELS)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        models = [m for m in transfer.MODELS if m in options['models']]
+        if options['format'] == 'jsonl':
+            total = self.export_jsonl(options['path'], models, options)
+        else:
+            total = self.export_csv(options['path'], models, options)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено записей: {total} за {elapsed:.1f} с '
+            f'({total / elapsed:.0f} в секунду)'))
+
+    def export_jsonl(self, path, models, options):
+        out = (sys.stdout if path == '-'
+               else open(path, 'w', encoding='utf-8'))
+        total = 0
+        try:
+            for model in models:
+                for record in transfer.export_records(
+                        model, options['chunk_size']):
+                    out.write(json.dumps(record, ensure_ascii=False))
+                    out.write('\n')
+                    total += 1
+                self.report(model, total)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return total
+
+    def export_csv(self, path, models, options):
+        os.makedirs(path, exist_ok=True)
+        total = 0
+        for model in models:
+            filename = os.path.join(path, f'{model}.csv')
+            with open(filename, 'w', encoding='utf-8', newline='') as out:
+                writer = csv.DictWriter(
+                    out, fieldnames=transfer.FIELDS[model],
+                    extrasaction='ignore')
+                writer.writeheader()
+                for record in transfer.export_records(
+                        model, options['chunk_size']):
+                    writer.writerow(record)
+                    total += 1
+            self.report(model, total)
+        return total
+
+    def report(self, model, total):
+        self.stderr.write(f'{model}: всего выгружено {total}')
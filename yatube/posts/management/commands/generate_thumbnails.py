@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts import tasks
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Ставит в очередь (или рендерит) миниатюры изображений постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sync', action='store_true',
+            help='Рендерить сразу, без очереди задач')
+
+    def handle(self, *args, **options):
+        post_ids = Post.objects.exclude(image='').values_list(
+            'pk', flat=True).order_by('pk')
+        count = 0
+        for post_id in post_ids.iterator():
+            if options['sync']:
+                tasks.generate_thumbnails(post_id=post_id)
+            else:
+                tasks.generate_thumbnails.delay(post_id=post_id)
+            count += 1
+        action = 'Отрендерено' if options['sync'] else 'Поставлено в очередь'
+        self.stdout.write(self.style.SUCCESS(f'{action} постов: {count}'))
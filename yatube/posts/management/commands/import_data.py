@@ -0,0 +1,71 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает данные, выгруженные export_data, пачками bulk_create; '
+        'счётчики, ленты и поиск пересчитываются в конце')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл JSONL («-» — stdin) или каталог с CSV')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default='jsonl')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поиск')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        importer = transfer.Importer(
+            options['batch_size'], progress=self.progress)
+        records = (self.read_jsonl(options['path'])
+                   if options['format'] == 'jsonl'
+                   else self.read_csv(options['path']))
+        try:
+            for record in records:
+                importer.add(record)
+            importer.finish(rebuild=not options['no_rebuild'])
+        except (ValueError, KeyError, IntegrityError) as error:
+            raise CommandError(f'Некорректная запись: {error}')
+        elapsed = max(time.monotonic() - started, 1e-6)
+        total = sum(importer.saved.values())
+        skipped = sum(importer.skipped.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено записей: {total}, пропущено: {skipped} '
+            f'за {elapsed:.1f} с ({total / elapsed:.0f} в секунду)'))
+
+    def progress(self, model, saved, rate):
+        self.stdout.write(f'{model}: {saved} ({rate:.0f} записей в секунду)')
+
+    def read_jsonl(self, path):
+        source = (sys.stdin if path == '-'
+                  else open(path, encoding='utf-8'))
+        try:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+    def read_csv(self, path):
+        for model in transfer.MODELS:
+            filename = os.path.join(path, f'{model}.csv')
+            if not os.path.exists(filename):
+                continue
+            with open(filename, encoding='utf-8', newline='') as source:
+                for row in csv.DictReader(source):
+                    row['model'] = model
+                    yield row
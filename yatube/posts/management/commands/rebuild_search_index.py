@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Строит заново полнотекстовый индекс постов и комментариев'
+
+    def handle(self, *args, **options):
+        if not search.create_table(connection):
+            self.stdout.write(self.style.WARNING(
+                'FTS5 недоступен: поиск работает через icontains'))
+            return
+        started = time.monotonic()
+        total = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {total} '
+            f'за {time.monotonic() - started:.1f} с'))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными со степенным '
+        'распределением подписчиков')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--follows-per-user', type=float, default=20,
+            help='Среднее число подписок у пользователя')
+        parser.add_argument(
+            '--alpha', type=float, default=1.1,
+            help='Показатель степенного закона популярности авторов')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--prefix', default='user',
+            help='Префикс имён пользователей и групп')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        importer = benchmark.seed(
+            progress=self.progress,
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows_per_user=options['follows_per_user'],
+            alpha=options['alpha'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+        )
+        summary = ', '.join(
+            f'{model}: {count}' for model, count in importer.saved.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {summary} за {time.monotonic() - started:.1f} с'))
+
+    def progress(self, model, saved, rate):
+        self.stdout.write(f'{model}: {saved} ({rate:.0f} записей в секунду)')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги популярных постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Начать заново с окна последних дней',
+        )
+
+    def handle(self, *args, reset=False, **options):
+        if reset:
+            trending.reset()
+        if not trending.refresh():
+            self.stderr.write('Пересчёт уже идёт в другом процессе')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Популярных постов: {len(trending.top_ids())}'))
@@ -0,0 +1,74 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:28
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    keep = Follow.objects.values('user', 'author').order_by().annotate(
+        first=Min('pk')).values('first')
+    duplicates = Follow.objects.exclude(pk__in=keep)
+    affected = set()
+    for user_id, author_id in duplicates.values_list('user', 'author'):
+        affected.update((user_id, author_id))
+    if not affected:
+        return
+    duplicates.delete()
+    # 0009 посчитал подписчиков вместе с дублями.
+    follows = Follow.objects.order_by()
+    followers = dict(follows.filter(author__in=affected).values(
+        'author').annotate(n=Count('pk')).values_list('author', 'n'))
+    following = dict(follows.filter(user__in=affected).values(
+        'user').annotate(n=Count('pk')).values_list('user', 'n'))
+    for user_id in affected:
+        AuthorStats.objects.filter(user_id=user_id).update(
+            followers_count=followers.get(user_id, 0),
+            following_count=following.get(user_id, 0),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            drop_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.RemoveIndex(
+            model_name='timelineentry',
+            name='timeline_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created', 'id'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['author', 'user'], name='follow_author_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', '-id'], name='post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_user_feed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from posts import search
+
+    if search.create_table(schema_editor.connection):
+        search.rebuild(
+            apps.get_model('posts', 'Post'),
+            apps.get_model('posts', 'Comment'),
+            schema_editor.connection,
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    from posts import search
+
+    search.drop_table(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
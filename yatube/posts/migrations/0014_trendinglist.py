@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingList',
+            fields=[
+                ('key', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('post_ids', models.TextField(default='[]')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
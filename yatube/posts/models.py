@@ -5,6 +5,12 @@ from .constants import PREVIEW_TEXT_LENGTH
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты ленты вместе с авторами и группами одним запросом."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
@@ -14,8 +20,21 @@ class Post(models.Model):
         related_name='posts'
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'], name='post_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx',
+            ),
+        ]
 
     group = models.ForeignKey(
         'Group',
@@ -31,6 +50,10 @@ class Post(models.Model):
         blank=True
     )
 
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    # Версия для кэша фрагментов: меняется при правке и готовности миниатюр.
+    updated = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return self.text[:PREVIEW_TEXT_LENGTH]
 
@@ -58,6 +81,14 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_created_idx',
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.title
 
@@ -74,3 +105,88 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+            models.Index(
+                fields=['author', 'created', 'id'],
+                name='follow_author_created_idx',
+            ),
+            models.Index(
+                fields=['user', 'created', 'id'],
+                name='follow_user_created_idx',
+            ),
+        ]
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики пользователя.
+
+    Обновляются в тех же транзакциях, что и записи постов и подписок;
+    команда ``rebuild_counters`` пересчитывает их целиком.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: строка на пару (читатель, пост).
+
+    Автор и дата публикации продублированы из поста, чтобы лента читалась
+    и чистилась по индексам без соединения с таблицей постов.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_feed_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'], name='timeline_user_author_idx'
+            ),
+        ]
+
+
+class TrendingList(models.Model):
+    """Готовый список популярных постов: общий (``key`` = 'all') или группы
+    (``key`` — id группы).
+
+    Списки целиком пересобирает ``posts.trending.refresh``.
+    """
+    key = models.CharField(max_length=20, primary_key=True)
+    post_ids = models.TextField(default='[]')
+    updated = models.DateTimeField(auto_now=True)
@@ -0,0 +1,153 @@
+"""Массовая модерация: удаление постов, перенос в группу, чистка авторов.
+
+Действия админки ставят фоновые задачи из ``posts.tasks``, а задачи
+обрабатывают строки порциями по ``MODERATION_BATCH_SIZE``: каждая порция —
+отдельная транзакция, после которой сохраняется прогресс задачи. Посты
+удаляются прямыми DELETE по зависимым таблицам, без сборки каскада в
+Python и без сигналов, поэтому счётчики, поисковый индекс и версии кэша
+лент поправляются здесь же для каждой порции (воркеру для этого нужен общий
+с веб-процессами кэш, см. ``core.checks``). Повторный запуск упавшей
+задачи безопасен: уже обработанные строки просто не находятся.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core import auth
+from core.tasks import report_progress
+
+from . import counters, feed_cache, follow_graph, search, trending
+from .constants import MODERATION_BATCH_SIZE
+from .models import Comment, Follow, Post, TimelineEntry, User
+
+# Строки, которые удаляются вместе с постом (on_delete=CASCADE).
+POST_CASCADE = ((Comment, 'post_id'), (TimelineEntry, 'post_id'))
+
+
+class Progress:
+    def __init__(self, total):
+        self.done = 0
+        report_progress(0, total)
+
+    def advance(self, count):
+        self.done += count
+        report_progress(self.done)
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    for start in range(0, len(ids), MODERATION_BATCH_SIZE):
+        yield ids[start:start + MODERATION_BATCH_SIZE]
+
+
+def _delete_rows(cursor, model, column, ids):
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(
+        f'DELETE FROM {model._meta.db_table} '
+        f'WHERE {column} IN ({placeholders})', ids)
+
+
+def _post_scopes(rows):
+    """Области кэша лент, в которых видны посты (id, автор, группа)."""
+    scopes = {('posts',)}
+    for pk, author_id, group_id in rows:
+        scopes.update({('post', pk), ('author', author_id)})
+        if group_id is not None:
+            scopes.add(('group', group_id))
+    return scopes
+
+
+def _delete_posts_batch(post_ids):
+    rows = list(Post.objects.filter(pk__in=post_ids).values_list(
+        'pk', 'author_id', 'group_id'))
+    ids = [row[0] for row in rows]
+    if not ids:
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model, column in POST_CASCADE:
+            _delete_rows(cursor, model, column, ids)
+        _delete_rows(cursor, Post, 'id', ids)
+        for author_id, count in Counter(row[1] for row in rows).items():
+            counters.bump_user(author_id, posts_count=-count)
+        search.remove_posts(ids)
+        feed_cache.bump(*_post_scopes(rows))
+
+
+def delete_posts(post_ids, progress=None):
+    """Удаляет посты вместе с комментариями и записями лент."""
+    post_ids = list(post_ids)
+    progress = progress or Progress(len(post_ids))
+    for batch in _chunks(post_ids):
+        _delete_posts_batch(batch)
+        progress.advance(len(batch))
+    trending.schedule()
+
+
+def move_posts(post_ids, group_id):
+    """Переносит посты в группу; ``updated`` сбрасывает кэш карточек."""
+    post_ids = list(post_ids)
+    progress = Progress(len(post_ids))
+    for batch in _chunks(post_ids):
+        rows = list(Post.objects.filter(pk__in=batch).exclude(
+            group_id=group_id).values_list('pk', 'author_id', 'group_id'))
+        with transaction.atomic():
+            Post.objects.filter(pk__in=[row[0] for row in rows]).update(
+                group_id=group_id, updated=timezone.now())
+            feed_cache.bump(('group', group_id), *_post_scopes(rows))
+        progress.advance(len(batch))
+    trending.schedule()
+
+
+def _delete_comments_batch(comment_ids):
+    rows = list(Comment.objects.filter(pk__in=comment_ids).values_list(
+        'pk', 'post_id'))
+    if not rows:
+        return
+    post_ids = {post_id for _, post_id in rows}
+    with transaction.atomic(), connection.cursor() as cursor:
+        _delete_rows(cursor, Comment, 'id', [row[0] for row in rows])
+        counters.recount_comments(post_ids)
+        for post_id in post_ids:
+            search.index_post(post_id)
+        feed_cache.bump(*(('post', post_id) for post_id in post_ids))
+
+
+def _delete_follows_batch(follow_ids):
+    rows = list(Follow.objects.filter(pk__in=follow_ids).values_list(
+        'pk', 'user_id', 'author_id'))
+    if not rows:
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        _delete_rows(cursor, Follow, 'id', [row[0] for row in rows])
+        for user_id, count in Counter(row[1] for row in rows).items():
+            counters.bump_user(user_id, following_count=-count)
+        for author_id, count in Counter(row[2] for row in rows).items():
+            counters.bump_user(author_id, followers_count=-count)
+        feed_cache.bump(
+            *{('follows', row[1]) for row in rows},
+            *{('author', row[2]) for row in rows})
+    follow_graph.forget({row[1] for row in rows})
+
+
+def purge_authors(author_ids):
+    """Блокирует авторов и удаляет их посты, комментарии и подписки."""
+    User.objects.filter(pk__in=author_ids).update(is_active=False)
+    auth.forget(author_ids)
+    post_ids = list(Post.objects.filter(
+        author_id__in=author_ids).values_list('pk', flat=True))
+    comment_ids = list(Comment.objects.filter(
+        author_id__in=author_ids).values_list('pk', flat=True))
+    follow_ids = list(Follow.objects.filter(
+        Q(user_id__in=author_ids) | Q(author_id__in=author_ids)
+    ).values_list('pk', flat=True))
+    progress = Progress(len(post_ids) + len(comment_ids) + len(follow_ids))
+    delete_posts(post_ids, progress)
+    for batch in _chunks(comment_ids):
+        _delete_comments_batch(batch)
+        progress.advance(len(batch))
+    for batch in _chunks(follow_ids):
+        _delete_follows_batch(batch)
+        progress.advance(len(batch))
+    TimelineEntry.objects.filter(user_id__in=author_ids).delete()
@@ -0,0 +1,316 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+На SQLite индекс — виртуальная таблица FTS5 ``posts_search``: строка на
+пост (``rowid`` = id поста) с основами слов текста поста и всех его
+комментариев. Слова приводятся к основе русским стеммером Snowball ещё в
+Python, поэтому запрос и индекс сравниваются по одним и тем же основам.
+Результаты ранжируются BM25, текст поста весит больше комментариев.
+
+Индекс обновляется сигналами. Правка поста заменяет только колонку его
+текста, новый комментарий дописывает свои основы к колонке комментариев:
+комментарии поста заново не стеммятся. Правка и удаление комментария
+переиндексируют пост целиком фоновой задачей ``reindex_post``;
+``manage.py rebuild_search_index`` строит индекс заново. На
+других СУБД (или без FTS5) поиск деградирует до ``icontains`` по всем
+словам запроса, результаты идут по дате.
+"""
+import re
+
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.db.models import Q
+
+from . import tasks
+from .constants import SEARCH_BATCH_SIZE, SEARCH_REINDEX_TIMEOUT
+from .models import Comment, Post
+
+TABLE = 'posts_search'
+TEXT_WEIGHT = 2.0
+COMMENTS_WEIGHT = 1.0
+
+VOWELS = 'аеиоуыэюя'
+PERFECTIVE_GERUND = re.compile(
+    r'((?<=[ая])(в|вши|вшись)|(ив|ивши|ившись|ыв|ывши|ывшись))$')
+REFLEXIVE = re.compile(r'(ся|сь)$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$')
+PARTICIPLE = re.compile(r'((?<=[ая])(ем|нн|вш|ющ|щ)|(ивш|ывш|ующ))$')
+VERB = re.compile(
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)|'
+    r'(ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю))$')
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$')
+DERIVATIONAL = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+WORD = re.compile(r'\w+')
+
+UPSERT = (f'INSERT OR REPLACE INTO {TABLE} (rowid, text, comments) '
+          f'VALUES (%s, %s, %s)')
+REINDEX_KEY = 'search:reindex:{}'
+
+_enabled = {}
+
+
+def _region(word, start=0):
+    """Начало области R1 (или R2 при ``start`` = R1) по правилам Snowball."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def stem(word):
+    """Основа слова по русскому стеммеру Snowball; прочие слова — как есть.
+    """
+    word = word.lower().replace('ё', 'е')
+    match = re.search(f'[{VOWELS}]', word)
+    if match is None:
+        return word
+    prefix, rv = word[:match.end()], word[match.end():]
+    rv, found = PERFECTIVE_GERUND.subn('', rv)
+    if not found:
+        rv = REFLEXIVE.sub('', rv)
+        rv, found = ADJECTIVE.subn('', rv)
+        if found:
+            rv = PARTICIPLE.sub('', rv)
+        else:
+            rv, found = VERB.subn('', rv)
+            if not found:
+                rv = NOUN.sub('', rv)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    word = prefix + rv
+    r2 = _region(word, _region(word))
+    if DERIVATIONAL.search(word[r2:]):
+        word = DERIVATIONAL.sub('', word)
+    rv = word[len(prefix):]
+    rv, found = SUPERLATIVE.subn('', rv)
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    elif not found and rv.endswith('ь'):
+        rv = rv[:-1]
+    return prefix + rv
+
+
+def terms(text):
+    return [stem(word) for word in WORD.findall(text.lower())]
+
+
+def document(*texts):
+    return ' '.join(term for text in texts for term in terms(text))
+
+
+def create_table(conn):
+    """Создаёт таблицу FTS5; возвращает False, если FTS5 недоступен."""
+    if conn.vendor != 'sqlite':
+        return False
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5('
+                f'text, comments, tokenize="unicode61 remove_diacritics 0")')
+    except OperationalError:
+        return False
+    _enabled.pop(conn.alias, None)
+    return True
+
+
+def drop_table(conn):
+    if conn.vendor == 'sqlite':
+        with conn.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+    _enabled.pop(conn.alias, None)
+
+
+def enabled(conn=connection):
+    if conn.alias not in _enabled:
+        _enabled[conn.alias] = (
+            conn.vendor == 'sqlite'
+            and TABLE in conn.introspection.table_names())
+    return _enabled[conn.alias]
+
+
+def fill(conn, posts, comments):
+    """Наполняет индекс.
+
+    ``posts`` — пары (id, текст), ``comments`` — словарь
+    id поста -> список текстов комментариев. Всё пишется одной транзакцией:
+    в режиме autocommit SQLite фиксировал бы каждую строку отдельно.
+    """
+    batch = []
+    with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        for post_id, text in posts:
+            batch.append((
+                post_id, document(text),
+                document(*comments.get(post_id, ()))))
+            if len(batch) >= SEARCH_BATCH_SIZE:
+                cursor.executemany(UPSERT, batch)
+                batch = []
+        if batch:
+            cursor.executemany(UPSERT, batch)
+
+
+def _comment_texts(comment_model, post_ids=None, using='default'):
+    texts = {}
+    queryset = comment_model.objects.using(using).order_by(
+        'post_id', 'created', 'pk')
+    if post_ids is not None:
+        queryset = queryset.filter(post_id__in=post_ids)
+    for post_id, text in queryset.values_list(
+            'post_id', 'text').iterator(chunk_size=SEARCH_BATCH_SIZE):
+        texts.setdefault(post_id, []).append(text)
+    return texts
+
+
+def index_post(post_id):
+    """Переиндексирует пост вместе с его комментариями."""
+    if not enabled():
+        return
+    text = Post.objects.filter(
+        pk=post_id).values_list('text', flat=True).first()
+    if text is None:
+        remove_post(post_id)
+        return
+    comments = _comment_texts(Comment, [post_id]).get(post_id, ())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            UPSERT, [post_id, document(text), document(*comments)])
+
+
+def _indexed(cursor, post_id):
+    cursor.execute(
+        f'SELECT text, comments FROM {TABLE} WHERE rowid = %s', [post_id])
+    return cursor.fetchone()
+
+
+def index_text(post_id, text):
+    """Обновляет в индексе текст поста, не трогая его комментарии."""
+    if not enabled():
+        return
+    with connection.cursor() as cursor:
+        row = _indexed(cursor, post_id)
+        if row is None:
+            index_post(post_id)
+            return
+        cursor.execute(UPSERT, [post_id, document(text), row[1]])
+
+
+def add_comment(post_id, text):
+    """Дописывает основы нового комментария к проиндексированному посту.
+    """
+    if not enabled():
+        return
+    with connection.cursor() as cursor:
+        row = _indexed(cursor, post_id)
+        if row is None:
+            index_post(post_id)
+            return
+        comments = ' '.join(filter(None, (row[1], document(text))))
+        cursor.execute(UPSERT, [post_id, row[0], comments])
+
+
+def schedule_reindex(post_id):
+    """Ставит в очередь переиндексацию поста, если она ещё не стоит."""
+    if enabled() and cache.add(
+            REINDEX_KEY.format(post_id), 1, SEARCH_REINDEX_TIMEOUT):
+        tasks.reindex_post.delay(post_id=post_id)
+
+
+def reindex(post_id):
+    cache.delete(REINDEX_KEY.format(post_id))
+    index_post(post_id)
+
+
+def remove_post(post_id):
+    remove_posts([post_id])
+
+
+def remove_posts(post_ids):
+    if not enabled() or not post_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE rowid IN ({placeholders})',
+            list(post_ids))
+
+
+def rebuild(post_model=Post, comment_model=Comment, conn=connection):
+    """Строит индекс заново; возвращает число проиндексированных постов."""
+    if not enabled(conn):
+        return 0
+    with conn.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+    posts = post_model.objects.using(conn.alias).order_by(
+        'pk').values_list('pk', 'text')
+    fill(conn, posts.iterator(chunk_size=SEARCH_BATCH_SIZE),
+         _comment_texts(comment_model, using=conn.alias))
+    with conn.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return posts.count()
+
+
+def match_expression(query):
+    """Строка MATCH: все основы запроса в кавычках, неявный AND."""
+    return ' '.join(
+        '"{}"'.format(term.replace('"', '""')) for term in terms(query))
+
+
+class SearchResults:
+    """Ранжированные результаты FTS5, которые понимает ``Paginator``.
+
+    Срез выполняет запрос с LIMIT/OFFSET и загружает посты одним запросом.
+    """
+
+    def __init__(self, query):
+        self.expression = match_expression(query)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {TABLE} WHERE {TABLE} MATCH %s',
+                    [self.expression])
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def ids(self, limit=-1, offset=0):
+        """Id найденных постов по убыванию релевантности."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+                f'ORDER BY bm25({TABLE}, %s, %s), rowid DESC '
+                f'LIMIT %s OFFSET %s',
+                [self.expression, TEXT_WEIGHT, COMMENTS_WEIGHT, limit,
+                 offset])
+            return [row[0] for row in cursor.fetchall()]
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        limit = -1 if key.stop is None else max(key.stop - start, 0)
+        ids = self.ids(limit, start)
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search(query):
+    """Посты по запросу: ``SearchResults`` на FTS5 или QuerySet иначе."""
+    words = WORD.findall(query.lower())
+    if not words:
+        return Post.objects.none()
+    if enabled():
+        return SearchResults(query)
+    condition = Q()
+    for word in words:
+        condition &= (
+            Q(text__icontains=word) | Q(comments__text__icontains=word))
+    return Post.objects.for_feed().filter(condition).distinct()
@@ -0,0 +1,94 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (counters, feed_cache, follow_graph, search, timeline,
+               trending)
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(pre_save, sender=Post)
+def post_remember_group(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._old_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.bump_user(instance.author_id, posts_count=1)
+        timeline.fan_out(instance)
+        trending.schedule()
+    feed_cache.invalidate_post(
+        instance, getattr(instance, '_old_group_id', None))
+    if created:
+        search.index_post(instance.pk)
+    else:
+        search.index_text(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, posts_count=-1)
+    feed_cache.invalidate_post(instance)
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    feed_cache.bump(('post', instance.post_id))
+    if created:
+        counters.bump_comments(instance.post_id, 1)
+        trending.schedule()
+        search.add_comment(instance.post_id, instance.text)
+    else:
+        search.schedule_reindex(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+    feed_cache.bump(('post', instance.post_id))
+    search.schedule_reindex(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_user(instance.author_id, followers_count=1)
+        counters.bump_user(instance.user_id, following_count=1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        follow_graph.changed(instance.user_id)
+        feed_cache.bump(
+            ('author', instance.author_id), ('follows', instance.user_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, followers_count=-1)
+    counters.bump_user(instance.user_id, following_count=-1)
+    timeline.prune(instance.user_id, instance.author_id)
+    follow_graph.changed(instance.user_id)
+    feed_cache.bump(
+        ('author', instance.author_id), ('follows', instance.user_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed_cache.bump(('group', instance.pk), ('posts',))
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, raw=False, update_fields=None,
+                   **kwargs):
+    """Имя автора есть на карточках его постов; вход меняет только
+    ``last_login`` и страниц не сбрасывает."""
+    if created or raw or update_fields == frozenset({'last_login'}):
+        return
+    feed_cache.bump(('author', instance.pk))
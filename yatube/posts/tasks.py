@@ -0,0 +1,53 @@
+from django.utils import timezone
+
+from core.tasks import task
+
+from . import feed_cache, moderation, search, thumbnails, trending
+from .models import Post
+
+
+@task
+def generate_thumbnails(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    thumbnails.render_all(post.image)
+    Post.objects.filter(pk=post.pk).update(updated=timezone.now())
+    feed_cache.invalidate_post(post)
+
+
+@task
+def refresh_trending():
+    trending.run_scheduled()
+
+
+@task
+def reindex_post(post_id):
+    search.reindex(post_id)
+
+
+@task(atomic=False)
+def delete_posts(post_ids):
+    moderation.delete_posts(post_ids)
+
+
+@task(atomic=False)
+def delete_group_posts(group_ids):
+    moderation.delete_posts(Post.objects.filter(
+        group_id__in=group_ids).values_list('pk', flat=True))
+
+
+@task(atomic=False)
+def move_posts(post_ids, group_id):
+    moderation.move_posts(post_ids, group_id)
+
+
+@task(atomic=False)
+def move_group_posts(group_ids, group_id):
+    moderation.move_posts(Post.objects.filter(
+        group_id__in=group_ids).values_list('pk', flat=True), group_id)
+
+
+@task(atomic=False)
+def purge_authors(author_ids):
+    moderation.purge_authors(author_ids)
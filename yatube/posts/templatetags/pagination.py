@@ -0,0 +1,19 @@
+from django import template
+
+from posts.constants import PAGE_LINKS_RADIUS
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page, radius=PAGE_LINKS_RADIUS):
+    """Номера страниц вокруг текущей, первая и последняя; None — пропуск."""
+    last = page.paginator.num_pages
+    start = max(page.number - radius, 1)
+    end = min(page.number + radius, last)
+    numbers = list(range(start, end + 1))
+    if start > 1:
+        numbers[:0] = [1] if start == 2 else [1, None]
+    if end < last:
+        numbers += [last] if end == last - 1 else [None, last]
+    return numbers
@@ -0,0 +1,24 @@
+from django import template
+
+from posts import feed_cache
+from posts.constants import FEED_CACHE_TIMEOUT
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_fragment(post):
+    """Ключ и время жизни кэша карточки поста.
+
+    Кроме правки самого поста ключ меняют версии областей автора и группы:
+    переименование автора, правка или удаление группы.
+    """
+    scopes = [('author', post.author_id)]
+    if post.group_id is not None:
+        scopes.append(('group', post.group_id))
+    versions = feed_cache.versions(scopes)
+    return {
+        'key': ':'.join(str(part) for part in (
+            post.pk, post.updated.timestamp(), post.group_id, *versions)),
+        'timeout': FEED_CACHE_TIMEOUT,
+    }
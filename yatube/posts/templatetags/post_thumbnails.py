@@ -0,0 +1,10 @@
+from django import template
+
+from posts.thumbnails import backend
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image, geometry, **options):
+    return backend.get_ready_thumbnail(image, geometry, **options)
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.admin import EstimatedCountPaginator
+from posts.models import Comment, Group, Post, User
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        cls.author = User.objects.create(username='author')
+        cls.cats = Post.objects.create(
+            author=cls.author, text='Коты и кошки любят спать')
+        cls.dogs = Post.objects.create(
+            author=cls.author, text='Собаки охраняют дом')
+        Comment.objects.create(
+            post=cls.dogs, author=cls.author, text='А мой кот охраняет дом')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def add_posts(self, start, stop):
+        for number in range(start, stop):
+            Post.objects.create(
+                author=User.objects.create(username=f'user_{number}'),
+                group=Group.objects.create(
+                    title=f'Группа {number}', slug=f'group-{number}'),
+                text=f'Пост {number}')
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        executed = len(queries)
+        self.assertEqual(response.status_code, 200)
+        return executed
+
+    def test_changelist_queries_do_not_grow(self):
+        """Число запросов списка не зависит от числа строк"""
+        self.add_posts(0, 3)
+        self.changelist_queries()
+        few = self.changelist_queries()
+        self.add_posts(3, 23)
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_estimated_count(self):
+        """Без фильтров большая таблица не пересчитывается COUNT(*)"""
+        paginator = EstimatedCountPaginator(Post.objects.all(), 100)
+        with mock.patch('posts.admin.ADMIN_EXACT_COUNT_LIMIT', 0):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(paginator.count, self.dogs.pk)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+        filtered = EstimatedCountPaginator(
+            Post.objects.filter(author=self.author), 100)
+        self.assertEqual(filtered.count, 2)
+
+    def test_search_uses_index(self):
+        """Поиск в админке находит формы слова и текст комментариев"""
+        response = self.client.get(self.url, {'q': 'кот'})
+        self.assertEqual(
+            {post.pk for post in response.context['cl'].result_list},
+            {self.cats.pk, self.dogs.pk})
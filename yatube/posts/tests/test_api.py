@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Первый пост')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def urls(self):
+        return {
+            'api:index': reverse('api:index'),
+            'api:group_list': reverse('api:group_list', args=['group']),
+            'api:profile': reverse('api:profile', args=['author']),
+            'api:follow_index': reverse('api:follow_index'),
+            'api:post_detail': reverse(
+                'api:post_detail', args=[self.post.pk]),
+        }
+
+    def test_feeds_return_posts(self):
+        """Ленты API отдают посты в JSON"""
+        for name, url in self.urls().items():
+            with self.subTest(view=name):
+                data = self.client.get(url).json()
+                if name == 'api:post_detail':
+                    self.assertEqual(data['text'], self.post.text)
+                else:
+                    self.assertEqual(
+                        [post['id'] for post in data['results']],
+                        [self.post.pk])
+
+    def test_unchanged_page_is_not_modified(self):
+        """Повторный запрос с ETag отдаёт 304 без выборки постов"""
+        for name, url in self.urls().items():
+            with self.subTest(view=name):
+                etag = self.client.get(url)['ETag']
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(any(
+                    'posts_post"."text"' in query['sql']
+                    for query in queries.captured_queries))
+
+    def test_edit_changes_etag(self):
+        """Правка поста меняет ETag всех лент, где он виден"""
+        etags = {
+            name: self.client.get(url)['ETag']
+            for name, url in self.urls().items()
+        }
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for name, url in self.urls().items():
+            with self.subTest(view=name):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_post_etag(self):
+        """Комментарий меняет ETag поста, а в лентах числа комментариев нет"""
+        url = reverse('api:post_detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        self.post.comments.create(author=self.reader, text='Комментарий')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments_count'], 1)
+        for name, url in self.urls().items():
+            if name == 'api:post_detail':
+                continue
+            with self.subTest(view=name):
+                response = self.client.get(url)
+                self.assertNotIn('Last-Modified', response)
+                self.assertNotIn(
+                    'comments_count', response.json()['results'][0])
+
+    def test_comment_edit_changes_post_etag(self):
+        """Правка комментария меняет ETag поста"""
+        comment = self.post.comments.create(
+            author=self.reader, text='Комментарий')
+        url = reverse('api:post_detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        comment.text = 'Исправленный комментарий'
+        comment.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_feed_requires_auth(self):
+        """Лента подписок без авторизации — 401"""
+        response = Client().get(reverse('api:follow_index'))
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,58 @@
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from posts import benchmark, urls
+from posts.models import Follow, Post, User
+
+SEED = dict(users=40, groups=3, posts=80, comments=60, follows_per_user=6)
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_is_reproducible(self):
+        """Одинаковый seed даёт одинаковые данные"""
+        until = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        first = list(benchmark.seed_records(seed=7, until=until, **SEED))
+        second = list(benchmark.seed_records(seed=7, until=until, **SEED))
+        self.assertEqual(first, second)
+
+    def test_followers_follow_power_law(self):
+        """Подписчики сосредоточены у немногих авторов"""
+        benchmark.seed(**SEED)
+        self.assertEqual(Post.objects.count(), SEED['posts'])
+        followers = sorted(
+            User.objects.annotate(total=Count('following')).values_list(
+                'total', flat=True), reverse=True)
+        top = sum(followers[:len(followers) // 10])
+        self.assertGreater(top, Follow.objects.count() * 0.3)
+
+    def test_benchmark_covers_every_url(self):
+        """Замер проходит по всем адресам posts/urls.py и пишет JSON"""
+        call_command('seed_data', stdout=io.StringIO(), **SEED)
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'result.json')
+            call_command(
+                'benchmark_urls', iterations=2, warmup=0, output=output,
+                stdout=io.StringIO())
+            with open(output, encoding='utf-8') as source:
+                report = json.load(source)
+        self.assertEqual(
+            set(report['results']),
+            {pattern.name for pattern in urls.urlpatterns})
+        for result in report['results'].values():
+            self.assertLess(result['status'], 500)
+            self.assertGreater(result['queries'], 0)
+
+    def test_template_benchmark_modes(self):
+        """Рендер лент замеряется во всех режимах кэширования"""
+        benchmark.seed(**SEED)
+        results = benchmark.measure_templates(iterations=2)
+        self.assertIn('index', results)
+        for timings in results.values():
+            self.assertEqual(set(timings), set(benchmark.RENDER_MODES))
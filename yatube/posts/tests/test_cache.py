@@ -1,8 +1,11 @@
+from unittest import mock
+
 from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from ..models import Post, User
+from .. import feed_cache
+from ..models import Comment, Group, Post, User
 
 
 class CacheTests(TestCase):
@@ -10,9 +13,15 @@ class CacheTests(TestCase):
     def setUpClass(cls):
         super().setUpClass()
         cls.author = User.objects.create(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Описание',
+        )
         cls.post = Post.objects.create(
             text='Тестовый текст',
             author=cls.author,
+            group=cls.group,
             image=None,
         )
 
@@ -21,27 +30,68 @@ class CacheTests(TestCase):
         cache.clear()
 
     def test_cache(self):
-        """Тестируем кэширование"""
-        response = self.client.get(reverse('posts:index'))
-        cached_response_content = response.content
+        """Повторный запрос отдаётся из кэша без обращения к базе"""
+        url = reverse('posts:index')
+        response = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.guest_client.get(url)
+        self.assertEqual(cached.content, response.content)
+
+    def test_index_page_invalidated_by_new_post(self):
+        """Новый пост сразу сбрасывает кэш главной"""
+        self.guest_client.get(reverse('posts:index'))
         Post.objects.create(text='Пост 2', author=self.author)
-        response = self.client.get(reverse('posts:index'))
-        self.assertEqual(cached_response_content, response.content)
-        cache.clear()
-        response = self.client.get(reverse('posts:index'))
-        self.assertNotEqual(cached_response_content, response.content)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост 2')
 
-    def test_index_page_caches_content_for_anonymous(self):
-        """Кэш контента для неавторизованного пользователя"""
+    def test_index_page_invalidated_by_delete(self):
+        """Удалённый пост пропадает из кэша главной"""
         post = Post.objects.create(
             text='Текст для теста',
             author=self.author
         )
         response = self.guest_client.get(reverse('posts:index'))
-        content_old = response.content
+        self.assertContains(response, post.text)
         post.delete()
         response = self.guest_client.get(reverse('posts:index'))
-        self.assertEqual(response.content, content_old)
-        cache.clear()
-        response = self.guest_client.get(reverse('posts:index'))
-        self.assertNotEqual(response.content, content_old)
+        self.assertNotContains(response, 'Текст для теста')
+
+    def test_edit_moves_post_between_groups(self):
+        """Перенос поста сбрасывает кэш старой и новой группы"""
+        other = Group.objects.create(
+            title='Другая', slug='other', description='Описание')
+        old_url = reverse('posts:group_list', kwargs={'slug': 'test_slug'})
+        new_url = reverse('posts:group_list', kwargs={'slug': 'other'})
+        self.guest_client.get(old_url)
+        self.guest_client.get(new_url)
+        self.post.group = other
+        self.post.save()
+        self.assertNotContains(self.guest_client.get(old_url), 'Тестовый')
+        self.assertContains(self.guest_client.get(new_url), 'Тестовый')
+
+    def test_comment_invalidates_post_detail(self):
+        """Новый комментарий виден на закэшированной странице поста"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.guest_client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Свежий комментарий')
+        self.assertContains(self.guest_client.get(url), 'Свежий комментарий')
+
+    def test_unchanged_group_is_not_invalidated(self):
+        """Пост в другой группе не сбрасывает кэш этой группы"""
+        url = reverse('posts:group_list', kwargs={'slug': 'test_slug'})
+        self.guest_client.get(url)
+        Post.objects.create(text='Без группы', author=self.author)
+        with self.assertNumQueries(1):
+            self.guest_client.get(url)
+
+    def test_single_flight_serves_stale_copy(self):
+        """Пока страницу пересчитывает другой запрос, отдаётся старая копия"""
+        url = reverse('posts:index')
+        response = self.guest_client.get(url)
+        with mock.patch.object(feed_cache, '_is_fresh', return_value=False), \
+                mock.patch.object(feed_cache.cache, 'add',
+                                  return_value=False):
+            with self.assertNumQueries(0):
+                stale = self.guest_client.get(url)
+        self.assertEqual(stale.content, response.content)
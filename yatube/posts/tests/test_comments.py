@@ -1,6 +1,7 @@
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from ..constants import COMMENTS_PER_PAGE
 from ..models import Comment, Post, User
 
 
@@ -48,3 +49,44 @@ class CommentTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertRedirects(
             response, f'/auth/login/?next=/posts/{self.post.pk}/comment/')
+
+
+@override_settings(CACHES={
+    alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    for alias in ('default', 'post_fragments')})
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Комментарий {i}')
+            for i in range(COMMENTS_PER_PAGE + 5)
+        )
+        cls.comments = list(cls.post.comments.order_by('created', 'pk'))
+
+    def test_post_detail_shows_first_page(self):
+        """На странице поста только первая страница комментариев"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        page = response.context['comments']
+        self.assertEqual(
+            list(page), self.comments[:COMMENTS_PER_PAGE])
+        self.assertContains(response, 'Показать ещё комментарии')
+
+    def test_fragment_continues_from_cursor(self):
+        """Фрагмент отдаёт комментарии после курсора"""
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        first = self.client.get(url, {'format': 'json'}).json()
+        self.assertEqual(len(first['comments']), COMMENTS_PER_PAGE)
+        rest = self.client.get(url, {'after': first['next']})
+        self.assertEqual(
+            list(rest.context['comments']), self.comments[COMMENTS_PER_PAGE:])
+        self.assertNotContains(rest, 'Показать ещё комментарии')
+
+    def test_fragment_for_missing_post(self):
+        """Фрагмент несуществующего поста — 404"""
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import AuthorStats, Comment, Follow, Post, User
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_post_and_follow_counters(self):
+        """Счётчики меняются вместе с постами и подписками"""
+        Post.objects.create(author=self.author, text='Ещё пост')
+        Follow.objects.create(user=self.reader, author=self.author)
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.reader).following_count, 1)
+        Follow.objects.all().delete()
+        self.post.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 0)
+
+    def test_comment_counter(self):
+        """Счётчик комментариев поста"""
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        Comment.objects.all().delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_views_do_not_count(self):
+        """Профиль и пост берут количество постов из счётчика"""
+        AuthorStats.objects.filter(user=self.author).update(posts_count=42)
+        for url in (
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, '42')
+
+    def test_rebuild_command(self):
+        """Команда rebuild_counters пересчитывает счётчики"""
+        Comment.objects.create(post=self.post, author=self.reader, text='К')
+        Follow.objects.create(user=self.reader, author=self.author)
+        AuthorStats.objects.all().delete()
+        Post.objects.update(comments_count=0)
+        call_command('rebuild_counters', stdout=mock.MagicMock())
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count), (1, 1))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
@@ -0,0 +1,83 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.constants import FOLLOWS_PER_PAGE
+from posts.models import Follow, User
+
+
+class FollowGraphTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create(username='reader')
+        self.author = User.objects.create(username='author')
+        self.other = User.objects.create(username='other')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_following_ids_are_cached(self):
+        """Повторная проверка подписки не обращается к базе"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            follow_graph.following_ids(self.reader.pk), {self.author.pk})
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.reader, self.author.pk))
+            self.assertFalse(
+                follow_graph.is_following(self.reader, self.other.pk))
+
+    def test_follow_and_unfollow_update_graph(self):
+        """Подписка и отписка сразу видны в графе"""
+        follow_graph.following_ids(self.reader.pk)
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+        self.assertTrue(follow_graph.is_following(self.reader, self.author.pk))
+        self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}))
+        self.assertFalse(
+            follow_graph.is_following(self.reader, self.author.pk))
+
+    def test_repeated_follow(self):
+        """Повторная подписка не создаёт вторую запись"""
+        url = reverse('posts:profile_follow', kwargs={'username': self.author})
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            follow_graph.following_ids(self.reader.pk), {self.author.pk})
+
+    def test_anonymous_is_not_following(self):
+        """Гость ни на кого не подписан"""
+        self.assertFalse(follow_graph.is_following(
+            Client().get(reverse('posts:index')).wsgi_request.user,
+            self.author.pk))
+
+    def test_followers_cursor_pages(self):
+        """Подписчики листаются курсором, новые сначала"""
+        followers = [
+            User.objects.create(username=f'follower_{number}')
+            for number in range(FOLLOWS_PER_PAGE + 5)
+        ]
+        for follower in followers:
+            Follow.objects.create(user=follower, author=self.author)
+        url = reverse('posts:followers', kwargs={'username': self.author})
+        first = self.client.get(url).context['page_obj']
+        self.assertEqual(len(first), FOLLOWS_PER_PAGE)
+        self.assertEqual(first[0].user, followers[-1])
+        second = self.client.get(
+            url, {'cursor': first.next_cursor}).context['page_obj']
+        self.assertEqual(
+            [follow.user for follow in second], followers[4::-1])
+        self.assertFalse(second.has_next())
+
+    def test_following_list(self):
+        """Страница подписок показывает авторов"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.client.get(
+            reverse('posts:following', kwargs={'username': self.reader}))
+        self.assertEqual(
+            [follow.author for follow in response.context['page_obj']],
+            [self.author])
+        self.assertContains(
+            response, reverse('posts:profile', args=[self.author]))
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import feed_cache, trending
+from posts.models import Group, Post, User
+from posts.templatetags.pagination import page_window
+
+
+def make_page(number, num_pages):
+    return SimpleNamespace(
+        number=number, paginator=SimpleNamespace(num_pages=num_pages))
+
+
+class PostFragmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.post = Post.objects.create(author=self.author, text='Исходный')
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_fragment_is_reused_between_pages(self):
+        """Карточка поста берётся из кэша фрагментов"""
+        self.client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).update(text='Без версии')
+        feed_cache.bump(('posts',))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исходный')
+
+    def test_edit_changes_fragment_version(self):
+        """Правка поста меняет версию фрагмента"""
+        self.client.get(reverse('posts:index'))
+        self.client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': 'Исправленный'})
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный')
+        self.assertNotContains(response, 'Исходный')
+
+    def test_author_and_group_changes_reach_fragments(self):
+        """Переименование автора и удаление группы меняют карточку"""
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        self.client.get(reverse('posts:index'))
+        self.author.first_name = 'Новое'
+        self.author.save()
+        group.delete()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новое')
+        self.assertNotContains(
+            response, reverse('posts:group_list', args=['group']))
+
+    def test_popular_fragment_depends_on_page(self):
+        """Глобальная и групповая страницы популярного не делят карточки"""
+        group = Group.objects.create(title='Группа', slug='group')
+        self.post.group = group
+        self.post.save()
+        trending.refresh()
+        self.client.get(reverse('posts:group_popular', args=['group']))
+        response = self.client.get(reverse('posts:popular'))
+        self.assertContains(
+            response, reverse('posts:group_list', args=['group']))
+
+
+class PageWindowTests(TestCase):
+    def test_window(self):
+        """Ссылки только на соседние, первую и последнюю страницы"""
+        cases = [
+            ((1, 1), [1]),
+            ((1, 10), [1, 2, 3, 4, None, 10]),
+            ((5, 10), [1, 2, 3, 4, 5, 6, 7, 8, None, 10]),
+            ((6, 10), [1, None, 3, 4, 5, 6, 7, 8, 9, 10]),
+            ((50, 100), [1, None, 47, 48, 49, 50, 51, 52, 53, None, 100]),
+        ]
+        for (number, num_pages), expected in cases:
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(
+                    page_window(make_page(number, num_pages)), expected)
@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, skipUnlessDBFeature
+
+from posts.management.commands.explain_feeds import (
+    explain, explain_without_indexes, feed_queries)
+from posts.models import Follow, Group, Post, User
+
+
+class FeedIndexesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user')
+        cls.author = User.objects.create(username='author')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Post.objects.create(author=cls.author, group=group, text='Пост')
+
+    def test_follow_is_unique(self):
+        """Повторная подписка запрещена ограничением в базе"""
+        Follow.objects.create(user=self.user, author=self.author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.user, author=self.author)
+
+    @skipUnlessDBFeature('supports_explaining_query_execution')
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент читаются по индексам без сортировки"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('Планы проверяются на SQLite')
+        before = explain_without_indexes(feed_queries())
+        after = explain(feed_queries())
+        for name in ('index', 'group_list', 'profile', 'follow_index',
+                     'comments'):
+            with self.subTest(query=name):
+                self.assertIn('TEMP B-TREE', before[name])
+                self.assertNotIn('TEMP B-TREE', after[name])
+
+    def test_indexes_are_dropped_only_on_sqlite(self):
+        """На других СУБД индексы для сравнения планов не удаляются"""
+        with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                mock.patch.object(connection, 'schema_editor') as editor:
+            self.assertIsNone(explain_without_indexes(feed_queries()))
+        editor.assert_not_called()
@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import CASCADE
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import tasks as core_tasks
+from core.models import Task
+from posts import counters, moderation, search, tasks
+from posts.models import (AuthorStats, Comment, Follow, Group, Post,
+                          TimelineEntry, User)
+
+
+@mock.patch('posts.moderation.MODERATION_BATCH_SIZE', 2)
+class ModerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.spammer = User.objects.create(username='spammer')
+        self.reader = User.objects.create(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.other = Group.objects.create(title='Другая', slug='other')
+        Follow.objects.create(user=self.reader, author=self.spammer)
+        Follow.objects.create(user=self.spammer, author=self.reader)
+        self.spam = [
+            Post.objects.create(
+                author=self.spammer, group=self.group, text=f'Спам {n}')
+            for n in range(5)
+        ]
+        self.post = Post.objects.create(
+            author=self.reader, group=self.group, text='Нормальный пост')
+        Comment.objects.create(
+            post=self.spam[0], author=self.reader, text='Ответ')
+        Comment.objects.create(
+            post=self.post, author=self.spammer, text='Спам в комментариях')
+        Task.objects.all().delete()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def act(self, model, action, objects, **data):
+        url = reverse(f'admin:posts_{model}_changelist')
+        return self.client.post(url, {
+            'action': action,
+            '_selected_action': [obj.pk for obj in objects],
+            **data,
+        })
+
+    def run_task(self):
+        core_tasks.run_pending()
+        return Task.objects.exclude(
+            name=tasks.refresh_trending.task_name).get()
+
+    def test_delete_in_background(self):
+        """Посты удаляются задачей порциями вместе с зависимыми строками"""
+        self.act('post', 'delete_in_background', self.spam)
+        self.assertEqual(Post.objects.filter(author=self.spammer).count(), 5)
+        task_obj = self.run_task()
+        self.assertEqual(task_obj.status, Task.DONE)
+        self.assertEqual((task_obj.progress, task_obj.total), (5, 5))
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.filter(text='Ответ').exists())
+        self.assertFalse(TimelineEntry.objects.filter(
+            post_id__in=[post.pk for post in self.spam]).exists())
+        self.assertEqual(counters.for_user(self.spammer.pk).posts_count, 0)
+        self.assertEqual(list(search.search('спам')), [self.post])
+
+    def test_move_to_group(self):
+        """Перенос меняет группу и версию карточки поста"""
+        updated = self.spam[0].updated
+        self.act('post', 'move_to_group', self.spam, group=self.other.pk)
+        self.run_task()
+        self.assertEqual(self.other.posts.count(), 5)
+        self.spam[0].refresh_from_db()
+        self.assertGreater(self.spam[0].updated, updated)
+
+    def test_move_requires_group(self):
+        """Без выбранной группы задача не ставится"""
+        self.act('post', 'move_to_group', self.spam)
+        self.assertFalse(Task.objects.exists())
+
+    def test_group_actions(self):
+        """Действия групп обрабатывают все посты группы"""
+        self.act('group', 'move_posts', [self.group], group=self.other.pk)
+        self.run_task()
+        self.assertEqual(self.other.posts.count(), 6)
+        Task.objects.all().delete()
+        self.act('group', 'delete_posts', [self.other])
+        self.run_task()
+        self.assertFalse(Post.objects.exists())
+
+    def test_purge_authors(self):
+        """Чистка блокирует автора и удаляет его посты, комментарии и
+        подписки с пересчётом счётчиков"""
+        self.act('post', 'purge_authors', self.spam[:1])
+        task_obj = self.run_task()
+        self.assertEqual((task_obj.progress, task_obj.total), (8, 8))
+        self.spammer.refresh_from_db()
+        self.assertFalse(self.spammer.is_active)
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+        stats = AuthorStats.objects.get(user=self.reader)
+        self.assertEqual(
+            (stats.followers_count, stats.following_count), (0, 0))
+
+    def test_empty_batches_are_skipped(self):
+        """Пачка без строк (уже удалённых) не выполняет DELETE"""
+        for delete in (moderation._delete_posts_batch,
+                       moderation._delete_comments_batch,
+                       moderation._delete_follows_batch):
+            with self.subTest(delete=delete.__name__), \
+                    CaptureQueriesContext(connection) as queries:
+                delete([0])
+            self.assertFalse(any(
+                'DELETE' in query['sql'] for query in queries))
+
+    def test_cascade_covers_post_relations(self):
+        """Прямое удаление учитывает все каскадные связи поста"""
+        cascades = {
+            (rel.related_model, rel.field.column)
+            for rel in Post._meta.related_objects
+            if rel.on_delete is CASCADE
+        }
+        self.assertEqual(cascades, {
+            (model, column) for model, column in moderation.POST_CASCADE})
@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+FEED_SIZE = 10
+
+
+class QueryBudgetTests(TestCase):
+    """Бюджет SQL-запросов страниц: число запросов не зависит от постов."""
+
+    budgets = {
+        'posts:index': 2,
+        'posts:group_list': 3,
+        'posts:profile': 5,
+        'posts:post_detail': 3,
+        'posts:post_comments': 2,
+        'posts:follow_index': 3,
+        'posts:followers': 2,
+        'posts:following': 2,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.author = User.objects.create(username='author')
+        for number in range(FEED_SIZE):
+            author = User.objects.create(username=f'author_{number}')
+            Follow.objects.create(user=cls.reader, author=author)
+            Post.objects.create(
+                author=author, group=cls.group, text=f'Пост {number}')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост с комментариями')
+        for number in range(FEED_SIZE):
+            Post.objects.create(author=cls.author, text=f'Пост {number}')
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create(username=f'commentator_{number}'),
+                text=f'Комментарий {number}',
+            )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def urls(self):
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.author}),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}),
+            'posts:post_comments': reverse(
+                'posts:post_comments', kwargs={'post_id': self.post.pk}),
+            'posts:follow_index': reverse('posts:follow_index'),
+            'posts:followers': reverse(
+                'posts:followers', kwargs={'username': 'author_0'}),
+            'posts:following': reverse(
+                'posts:following', kwargs={'username': self.reader}),
+        }
+
+    def test_views_stay_within_query_budget(self):
+        """Страницы укладываются в бюджет запросов"""
+        for name, url in self.urls().items():
+            with self.subTest(view=name):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(
+                    len(queries) - self.auth_queries(),
+                    self.budgets[name],
+                    '\n'.join(q['sql'] for q in queries.captured_queries),
+                )
+
+    def auth_queries(self):
+        """Запросы сессии и пользователя, которые делает middleware."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('about:author'))
+        return len(queries)
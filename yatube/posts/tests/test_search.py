@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import run_pending
+from posts import search
+from posts.models import Comment, Post, User
+from posts.tasks import reindex_post
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова приводятся к одной основе"""
+        for forms in (
+            ('красивые', 'красивая', 'красивого'),
+            ('кот', 'котами', 'коту'),
+            ('ёлка', 'елки'),
+        ):
+            with self.subTest(forms=forms):
+                self.assertEqual(len({search.stem(f) for f in forms}), 1)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.cats = Post.objects.create(
+            author=self.author, text='Коты и кошки любят спать')
+        self.dogs = Post.objects.create(
+            author=self.author, text='Собаки охраняют дом')
+        Comment.objects.create(
+            post=self.dogs, author=self.author, text='А мой кот охраняет дом')
+        self.client = Client()
+
+    def found(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_index_is_fts5_on_sqlite(self):
+        """На SQLite поиск идёт по таблице FTS5"""
+        self.assertEqual(search.enabled(), connection.vendor == 'sqlite')
+
+    def test_post_text_ranks_above_comments(self):
+        """Совпадение в тексте поста выше совпадения в комментарии"""
+        self.assertEqual(self.found('котов'), [self.cats, self.dogs])
+
+    def test_all_words_must_match(self):
+        """Все слова запроса должны встретиться в посте"""
+        self.assertEqual(self.found('охраняют дома'), [self.dogs])
+        self.assertEqual(self.found('кошки собаки'), [])
+
+    def test_index_follows_writes(self):
+        """Изменения и удаления сразу видны в поиске"""
+        self.cats.text = 'Попугаи разговаривают'
+        self.cats.save()
+        self.assertEqual(self.found('коты'), [self.dogs])
+        self.assertEqual(self.found('попугай'), [self.cats])
+        self.dogs.comments.all().delete()
+        run_pending()
+        self.assertEqual(self.found('коты'), [])
+        self.cats.delete()
+        self.assertEqual(self.found('попугай'), [])
+
+    def test_new_comment_is_appended(self):
+        """Новый комментарий индексируется без перечитывания остальных"""
+        with mock.patch('posts.search.index_post') as index_post:
+            Comment.objects.create(
+                post=self.cats, author=self.author, text='Рыбки молчат')
+        index_post.assert_not_called()
+        self.assertEqual(self.found('рыбки'), [self.cats])
+        self.assertEqual(self.found('кот'), [self.cats, self.dogs])
+
+    def test_post_edit_keeps_comment_terms(self):
+        """Правка поста не перечитывает его комментарии"""
+        self.dogs.text = 'Собаки лают'
+        with mock.patch('posts.search._comment_texts') as comment_texts:
+            self.dogs.save()
+        comment_texts.assert_not_called()
+        self.assertEqual(self.found('лают'), [self.dogs])
+        self.assertEqual(self.found('кот'), [self.cats, self.dogs])
+
+    def test_comment_delete_reindexes_in_background(self):
+        """Удаление комментария переиндексирует пост одной задачей"""
+        Comment.objects.create(
+            post=self.dogs, author=self.author, text='Рыбки молчат')
+        self.dogs.comments.all().delete()
+        self.assertEqual(self.found('рыбки'), [self.dogs])
+        self.assertEqual(Task.objects.filter(
+            name=reindex_post.task_name, status=Task.PENDING).count(), 1)
+        run_pending()
+        self.assertEqual(self.found('рыбки'), [])
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index восстанавливает индекс"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.TABLE}')
+        self.assertEqual(self.found('собаки'), [])
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.found('собаки'), [self.dogs])
+
+    def test_empty_query(self):
+        """Пустой запрос не находит ничего"""
+        self.assertEqual(self.found(''), [])
@@ -0,0 +1,60 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import tasks
+from core.models import Task
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='photo.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_upload_enqueues_thumbnails_and_shows_placeholder(self):
+        """Загрузка ставит миниатюры в очередь, до рендера виден заглушка"""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'С картинкой', 'image': make_image()})
+        self.assertEqual(
+            Task.objects.filter(name__endswith='generate_thumbnails').count(),
+            1)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Изображение обрабатывается')
+        tasks.run_pending()
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Изображение обрабатывается')
+        self.assertContains(response, '<img class="card-img my-2" src="')
+
+    def test_backfill_command(self):
+        """Команда generate_thumbnails рендерит миниатюры старых постов"""
+        Post.objects.create(
+            author=self.author, text='Старый', image=make_image('old.png'))
+        call_command(
+            'generate_thumbnails', sync=True, stdout=open('/dev/null', 'w'))
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Изображение обрабатывается')
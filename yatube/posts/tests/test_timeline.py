@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create(username='reader')
+        self.author = User.objects.create(username='author')
+        self.old_post = Post.objects.create(
+            author=self.author, text='Старый пост')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_timeline(self):
+        """Подписка добавляет в ленту уже опубликованные посты автора"""
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=self.old_post).exists())
+        self.assertEqual(self.feed(), [self.old_post])
+
+    @mock.patch('posts.timeline.TIMELINE_BACKFILL_LIMIT', 2)
+    def test_backfill_is_limited_to_recent_posts(self):
+        """При подписке в ленту копируются только последние посты автора"""
+        recent = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(2)
+        ]
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed(), recent[::-1])
+
+    @mock.patch('posts.timeline.TIMELINE_BACKFILL_LIMIT', 1)
+    @mock.patch('posts.timeline.FANOUT_FOLLOWER_LIMIT', 0)
+    def test_pull_popular_is_limited_to_recent_posts(self):
+        """Посты популярного автора подтягиваются только за последнее окно"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(self.feed(), [new_post])
+
+    def test_new_post_is_fanned_out(self):
+        """Новый пост сразу попадает в ленты подписчиков"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=new_post).exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_unfollow_prunes_timeline(self):
+        """Отписка убирает посты автора из ленты"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}))
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed(), [])
+
+    @mock.patch('posts.timeline.FANOUT_FOLLOWER_LIMIT', 0)
+    def test_popular_author_is_pulled_on_read(self):
+        """Посты популярного автора подтягиваются при чтении ленты"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader, post=new_post).exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=new_post).exists())
+
+    def test_rebuild_command(self):
+        """Команда rebuild_timelines восстанавливает ленты"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=mock.MagicMock())
+        self.assertEqual(self.feed(), [self.old_post])
+
+    @mock.patch('posts.timeline.TIMELINE_BACKFILL_LIMIT', 1)
+    def test_rebuild_copies_recent_posts_of_regular_authors(self):
+        """Пересборка берёт последние посты и пропускает популярных авторов"""
+        popular = User.objects.create(username='popular')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=popular)
+        Follow.objects.create(user=self.author, author=popular)
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        Post.objects.create(author=popular, text='Популярный')
+        with mock.patch('posts.timeline.FANOUT_FOLLOWER_LIMIT', 1):
+            timeline.rebuild()
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('post', flat=True)),
+            [new_post.pk])
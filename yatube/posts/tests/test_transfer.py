@@ -0,0 +1,97 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from posts import counters, search, timeline
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.author = User.objects.create(username='author', first_name='А')
+        self.reader = User.objects.create(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.date = datetime(2020, 5, 1, 12, 0, tzinfo=timezone.utc)
+        post = Post.objects.create(
+            author=self.author, group=group, text='Импортируемый пост')
+        Post.objects.filter(pk=post.pk).update(pub_date=self.date)
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def round_trip(self, fmt, path):
+        call_command(
+            'export_data', path, format=fmt, stderr=io.StringIO())
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        User.objects.exclude(username='reader').delete()
+        output = io.StringIO()
+        call_command('import_data', path, format=fmt, stdout=output)
+        return output.getvalue()
+
+    def check_imported(self):
+        post = Post.objects.get()
+        author = User.objects.get(username='author')
+        self.assertEqual(post.author, author)
+        self.assertEqual(author.first_name, 'А')
+        self.assertEqual(post.group.slug, 'group')
+        self.assertEqual(post.pub_date, self.date)
+        self.assertEqual(post.comments.get().author, self.reader)
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=author).exists())
+        self.assertEqual(counters.for_user(author.pk).posts_count, 1)
+        self.assertEqual(Post.objects.get().comments_count, 1)
+        self.assertEqual(list(timeline.timeline_posts(self.reader.pk)), [post])
+        self.assertEqual(
+            list(search.search('импортируемые посты')[0:10]), [post])
+
+    def test_jsonl_round_trip(self):
+        """Выгрузка и загрузка JSONL сохраняют данные и связи"""
+        output = self.round_trip('jsonl', os.path.join(self.tmp, 'dump.jsonl'))
+        self.check_imported()
+        self.assertIn('в секунду', output)
+
+    def test_csv_round_trip(self):
+        """Выгрузка и загрузка CSV сохраняют данные и связи"""
+        self.round_trip('csv', self.tmp)
+        self.check_imported()
+
+    def test_import_into_non_empty_database(self):
+        """Повторный импорт не конфликтует с существующими постами"""
+        path = os.path.join(self.tmp, 'dump.jsonl')
+        call_command('export_data', path, stderr=io.StringIO())
+        call_command('import_data', path, stdout=io.StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_sequences_are_reset_after_import(self):
+        """После импорта последовательности id сдвигаются за новые посты"""
+        path = os.path.join(self.tmp, 'dump.jsonl')
+        call_command('export_data', path, stderr=io.StringIO())
+        with mock.patch.object(
+                connection.ops, 'sequence_reset_sql',
+                return_value=['SELECT 1']) as reset:
+            call_command('import_data', path, stdout=io.StringIO())
+        self.assertEqual(reset.call_args[0][1], [Post, Comment])
+        Post.objects.create(author=self.author, text='После импорта')
+
+    def test_comments_need_posts_from_same_import(self):
+        """Комментарий к посту не из этой загрузки — ошибка импорта"""
+        path = os.path.join(self.tmp, 'comments.jsonl')
+        with open(path, 'w', encoding='utf-8') as dump:
+            dump.write(
+                '{"model": "comment", "post": 1, "author": "reader", '
+                '"text": "Без поста"}\n')
+        with self.assertRaisesMessage(CommandError, 'нет в загрузке'):
+            call_command('import_data', path, stdout=io.StringIO())
+        self.assertEqual(Comment.objects.count(), 1)
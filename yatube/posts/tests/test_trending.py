@@ -0,0 +1,104 @@
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import run_pending
+from posts import trending
+from posts.constants import TRENDING_HALF_LIFE
+from posts.models import Comment, Group, Post, User
+from posts.tasks import refresh_trending
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.quiet = Post.objects.create(
+            author=self.author, group=self.group, text='Тихий пост')
+        self.busy = Post.objects.create(author=self.author, text='Обсуждаемый')
+
+    def comment(self, post, count=1, created=None):
+        for number in range(count):
+            comment = Comment.objects.create(
+                post=post, author=self.reader, text=f'Комментарий {number}')
+            if created is not None:
+                Comment.objects.filter(pk=comment.pk).update(created=created)
+
+    def test_comment_velocity_ranks_posts(self):
+        """Пост с комментариями выше поста без них"""
+        self.comment(self.busy, 3)
+        self.assertTrue(trending.refresh())
+        self.assertEqual(trending.top_ids(), [self.busy.pk, self.quiet.pk])
+        self.assertEqual(trending.top_ids(self.group.pk), [self.quiet.pk])
+
+    def test_recent_comments_outweigh_old(self):
+        """Старые комментарии весят меньше свежих"""
+        old = timezone.now() - timedelta(seconds=TRENDING_HALF_LIFE * 3)
+        self.comment(self.busy, 3, created=old)
+        self.comment(self.quiet, 1)
+        trending.refresh()
+        self.assertEqual(trending.top_ids()[0], self.quiet.pk)
+
+    def test_refresh_is_incremental(self):
+        """Повторный пересчёт читает только новые записи"""
+        trending.refresh()
+        self.comment(self.quiet, 2)
+        # Четыре чтения и замена списков в одной транзакции.
+        with self.assertNumQueries(8):
+            trending.refresh()
+        self.assertEqual(trending.top_ids()[0], self.quiet.pk)
+
+    def test_landmark_rescale_keeps_order(self):
+        """Сдвиг опорного момента не меняет порядок"""
+        self.comment(self.busy, 2)
+        trending.refresh()
+        trending.refresh(now=time.time() + 100 * TRENDING_HALF_LIFE)
+        state = cache.get(trending.STATE_KEY)
+        self.assertGreater(state['landmark'], time.time())
+        self.assertEqual(trending.top_ids(), [self.busy.pk, self.quiet.pk])
+
+    def test_deleted_and_moved_posts(self):
+        """Удалённые посты выпадают, переезд в группу учитывается"""
+        trending.refresh()
+        self.busy.group = self.group
+        self.busy.save()
+        self.quiet.delete()
+        trending.refresh()
+        self.assertEqual(trending.top_ids(), [self.busy.pk])
+        self.assertEqual(trending.top_ids(self.group.pk), [self.busy.pk])
+
+    def test_popular_pages(self):
+        """Страницы популярного читают готовые списки"""
+        self.comment(self.busy, 2)
+        trending.refresh()
+        client = Client()
+        with self.assertNumQueries(2):
+            response = client.get(reverse('posts:popular'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.busy, self.quiet])
+        response = client.get(
+            reverse('posts:group_popular', args=[self.group.slug]))
+        self.assertEqual(list(response.context['page_obj']), [self.quiet])
+
+    def test_refresh_runs_after_interval(self):
+        """Пересчёт из очереди учитывает все события своего интервала"""
+        Task.objects.all().delete()
+        cache.delete(trending.SCHEDULED_KEY)
+        self.comment(self.busy)
+        self.comment(self.quiet, 2)
+        task_obj = Task.objects.get(name=refresh_trending.task_name)
+        self.assertEqual(run_pending(), 0)
+        Task.objects.filter(pk=task_obj.pk).update(run_after=timezone.now())
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(trending.top_ids()[0], self.quiet.pk)
+        self.comment(self.busy, 3)
+        self.assertEqual(Task.objects.filter(
+            name=refresh_trending.task_name, status=Task.PENDING).count(), 1)
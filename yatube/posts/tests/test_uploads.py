@@ -0,0 +1,75 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.constants import IMAGE_MAX_PIXELS
+from posts.forms import PostForm
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size=(64, 48), name='photo.jpg', fmt='JPEG', **params):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, fmt, **params)
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_image_is_reencoded_without_metadata(self):
+        """Картинка уменьшается, пережимается и теряет EXIF"""
+        exif = Image.Exif()
+        exif[0x010f] = 'Camera'
+        upload = make_image((4000, 3000), exif=exif.tobytes())
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'С картинкой', 'image': upload})
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.endswith('.webp'))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, 'WEBP')
+            self.assertEqual(stored.size, (1920, 1440))
+            self.assertFalse(stored.info.get('exif'))
+
+    @mock.patch('posts.uploads.IMAGE_MAX_UPLOAD_SIZE', 1024)
+    def test_oversized_upload_is_rejected_before_decoding(self):
+        """Файл сверх лимита отклоняется, не доходя до Pillow"""
+        upload = make_image((512, 512))
+        with mock.patch('PIL.Image.open') as image_open:
+            response = self.client.post(reverse('posts:post_create'), {
+                'text': 'Большой файл', 'image': upload})
+        image_open.assert_not_called()
+        self.assertIn('image', response.context['form'].errors)
+        self.assertFalse(Post.objects.exists())
+
+    @mock.patch('posts.uploads.IMAGE_MAX_PIXELS', 1000)
+    def test_pixel_limit_is_checked_from_header(self):
+        """Число пикселей проверяется до декодирования"""
+        form = PostForm(
+            data={'text': 'Много пикселей'},
+            files={'image': make_image((100, 100))})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    def test_pillow_limit_is_untouched(self):
+        """Лимит пикселей не меняет глобальную настройку Pillow"""
+        self.assertNotEqual(Image.MAX_IMAGE_PIXELS, IMAGE_MAX_PIXELS)
@@ -8,6 +8,8 @@ from django.urls import reverse
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from ..models import Group, Post
 
@@ -203,3 +205,44 @@ class PaginatorViewTests(TestCase):
         """Проверяем выведение оставшихся постов на 2 странице"""
         response = self.guest_client.get(reverse('posts:index') + '?page=2')
         self.assertEqual(len(response.context.get('page_obj')), 5)
+
+    def test_cursor_paginator_walks_whole_feed(self):
+        """Курсорная пагинация проходит ленту без пропусков и повторов"""
+        response = self.guest_client.get(reverse('posts:index') + '?cursor=')
+        first_page = response.context.get('page_obj')
+        self.assertEqual(len(first_page), 10)
+        self.assertFalse(first_page.has_previous())
+        self.assertTrue(first_page.has_next())
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?cursor={first_page.next_cursor}')
+        second_page = response.context.get('page_obj')
+        self.assertEqual(len(second_page), 5)
+        self.assertFalse(second_page.has_next())
+        seen = [post.pk for post in first_page] + [
+            post.pk for post in second_page]
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True))
+        self.assertEqual(seen, expected)
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?cursor={second_page.previous_cursor}')
+        self.assertEqual(
+            list(response.context.get('page_obj')), list(first_page))
+
+    def test_cursor_paginator_does_not_count(self):
+        """Курсорная страница не выполняет COUNT(*)"""
+        url = reverse(
+            'posts:group_list', kwargs={'slug': self.group.slug}
+        ) + '?cursor='
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries.captured_queries)
+        )
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор отдаёт первую страницу"""
+        response = self.guest_client.get(
+            reverse('posts:index') + '?cursor=garbage')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context.get('page_obj')), 10)
@@ -0,0 +1,46 @@
+"""Миниатюры изображений постов.
+
+Миниатюры рендерятся в фоне задачей ``generate_thumbnails``, а шаблоны
+только ищут готовый файл в KV-хранилище sorl-thumbnail и никогда не
+декодируют исходник во время запроса.
+"""
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile
+
+from .constants import POST_THUMBNAILS
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    def thumbnail_file(self, source, geometry_string, options):
+        """Файл миниатюры с тем же именем, что даёт ``get_thumbnail``."""
+        options = dict(options)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        """Готовая миниатюра или ``None``, если её ещё не отрендерили."""
+        if not file_:
+            return None
+        thumbnail = self.thumbnail_file(
+            ImageFile(file_), geometry_string, options)
+        return default.kvstore.get(thumbnail)
+
+
+backend = PostThumbnailBackend()
+
+
+def render_all(image):
+    """Рендерит все размеры из ``POST_THUMBNAILS`` для изображения."""
+    for geometry, options in POST_THUMBNAILS:
+        backend.get_thumbnail(image, geometry, **options)
@@ -0,0 +1,158 @@
+"""Лента подписок с разносом постов при записи (fan-out-on-write).
+
+Новый пост сразу раскладывается по лентам подписчиков автора. Для
+популярных авторов (больше ``FANOUT_FOLLOWER_LIMIT`` подписчиков) разнос
+не делается: их посты подтягиваются в ленту читателя при её открытии
+(fan-out-on-read), начиная с последнего уже доставленного поста автора.
+При подписке и подтягивании в ленту копируются только последние
+``TIMELINE_BACKFILL_LIMIT`` постов: старше них ленту всё равно не
+листают, а вся история автора копировалась бы в запросе читателя.
+"""
+from django.db import connection, transaction
+from django.db.models import F, Max, Q
+
+from . import counters
+from .constants import (
+    FANOUT_FOLLOWER_LIMIT, TIMELINE_BACKFILL_LIMIT, TIMELINE_BATCH_SIZE,
+)
+from .models import AuthorStats, Follow, Post, TimelineEntry
+
+
+def is_popular(author_id):
+    return counters.for_user(author_id).followers_count > (
+        FANOUT_FOLLOWER_LIMIT)
+
+
+def _insert(entries):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= TIMELINE_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Кладёт новый пост в ленты всех подписчиков автора."""
+    if is_popular(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in follower_ids.iterator(chunk_size=TIMELINE_BATCH_SIZE)
+    )
+
+
+def deliver(user_id, posts):
+    """Добавляет посты из ``posts`` в ленту читателя."""
+    rows = posts.values_list('pk', 'author_id', 'pub_date')
+    _insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, author_id, pub_date in rows.iterator(
+            chunk_size=TIMELINE_BATCH_SIZE)
+    )
+
+
+def _recent(posts):
+    return posts.order_by('-pub_date', '-pk')[:TIMELINE_BACKFILL_LIMIT]
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту читателя последние посты автора, на которого он
+    подписался."""
+    deliver(user_id, _recent(Post.objects.filter(author_id=author_id)))
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты читателя посты автора, от которого он отписался."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def popular_following_ids(user):
+    return list(
+        AuthorStats.objects.filter(
+            user__in=Follow.objects.filter(user=user).values('author'),
+            followers_count__gt=FANOUT_FOLLOWER_LIMIT,
+        ).values_list('user', flat=True)
+    )
+
+
+def pull_popular(user):
+    """Догружает в ленту посты популярных авторов (fan-out-on-read)."""
+    author_ids = popular_following_ids(user)
+    if not author_ids:
+        return
+    delivered = dict(
+        TimelineEntry.objects.filter(
+            user=user, author_id__in=author_ids
+        ).values('author_id').annotate(
+            last=Max('pub_date')
+        ).values_list('author_id', 'last')
+    )
+    condition = Q()
+    for author_id in author_ids:
+        if author_id in delivered:
+            condition |= Q(
+                author_id=author_id, pub_date__gt=delivered[author_id]
+            )
+        else:
+            condition |= Q(author_id=author_id)
+    deliver(user.pk, _recent(Post.objects.filter(condition)))
+
+
+def timeline_posts(user_id):
+    """Посты ленты читателя в порядке индекса ``timeline_user_feed_idx``."""
+    return Post.objects.filter(timeline_entries__user_id=user_id).for_feed(
+    ).order_by(
+        F('timeline_entries__pub_date').desc(),
+        F('timeline_entries__post').desc(),
+    )
+
+
+def feed_for(user):
+    """Лента подписок читателя вместе с постами популярных авторов."""
+    pull_popular(user)
+    return timeline_posts(user.pk)
+
+
+def rebuild():
+    """Пересобирает все ленты с нуля по таблице подписок.
+
+    Строки копируются одним INSERT ... SELECT внутри базы, без передачи
+    постов через Python. Как и при подписке, от каждого автора берутся
+    последние ``TIMELINE_BACKFILL_LIMIT`` постов, а посты популярных
+    авторов не копируются: их подтягивает ``pull_popular``.
+    """
+    entries = TimelineEntry._meta.db_table
+    posts = Post._meta.db_table
+    follows = Follow._meta.db_table
+    stats = AuthorStats._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        TimelineEntry.objects.all().delete()
+        cursor.execute(
+            f'INSERT INTO {entries} (user_id, post_id, author_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+            f'FROM {follows} f JOIN ('
+            f'SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+            f'PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+            f') AS position FROM {posts}'
+            f') p ON p.author_id = f.author_id '
+            f'LEFT JOIN {stats} s ON s.user_id = f.author_id '
+            f'WHERE p.position <= %s '
+            f'AND COALESCE(s.followers_count, 0) <= %s',
+            [TIMELINE_BACKFILL_LIMIT, FANOUT_FOLLOWER_LIMIT],
+        )
@@ -0,0 +1,261 @@
+"""Массовый перенос пользователей, групп, постов, комментариев и подписок.
+
+Записи — словари с ключом ``model``; ссылки между ними идут по
+естественным ключам (имя пользователя, slug группы) и исходному id поста.
+Экспорт читает таблицы ``iterator(chunk_size=...)``, импорт копит записи
+пачками и сохраняет их ``bulk_create``, поэтому в памяти держатся только
+пачка и соответствие id постов. ``bulk_create`` не вызывает сигналы:
+счётчики, ленты, поисковый индекс и кэш страниц пересчитываются один раз
+в ``Importer.finish``.
+
+Id постов сохраняются со сдвигом на текущий максимальный id, так что
+импорт в непустую базу не конфликтует с существующими постами. Комментарии
+привязываются только к постам из той же загрузки: импортёр помнит, какой
+id получил каждый исходный пост, а ссылка на пост, которого в загрузке
+не было, — ошибка.
+"""
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, feed_cache, follow_graph, search, timeline
+from .models import Comment, Follow, Group, Post, User
+
+MODELS = ('user', 'group', 'post', 'comment', 'follow')
+
+FIELDS = {
+    'user': ('username', 'first_name', 'last_name', 'email'),
+    'group': ('slug', 'title', 'description'),
+    'post': ('id', 'author', 'group', 'text', 'pub_date', 'image'),
+    'comment': ('post', 'author', 'text', 'created'),
+    'follow': ('user', 'author', 'created'),
+}
+
+DEPENDENCIES = {
+    'post': ('user', 'group'),
+    'comment': ('user', 'post'),
+    'follow': ('user',),
+}
+
+_EXPORT_QUERIES = {
+    'user': lambda: User.objects.order_by('pk').values_list(
+        'username', 'first_name', 'last_name', 'email'),
+    'group': lambda: Group.objects.order_by('pk').values_list(
+        'slug', 'title', 'description'),
+    'post': lambda: Post.objects.order_by('pk').values_list(
+        'pk', 'author__username', 'group__slug', 'text', 'pub_date',
+        'image'),
+    'comment': lambda: Comment.objects.order_by('pk').values_list(
+        'post_id', 'author__username', 'text', 'created'),
+    'follow': lambda: Follow.objects.order_by('pk').values_list(
+        'user__username', 'author__username', 'created'),
+}
+
+
+def export_records(model, chunk_size):
+    """Записи одной модели в порядке id."""
+    fields = FIELDS[model]
+    for row in _EXPORT_QUERIES[model]().iterator(chunk_size=chunk_size):
+        record = {'model': model}
+        for field, value in zip(fields, row):
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            record[field] = value
+        yield record
+
+
+def _parse_date(value):
+    return (value and parse_datetime(value)) or timezone.now()
+
+
+@contextmanager
+def _keep_dates():
+    """Отключает ``auto_now_add``, чтобы сохранить исходные даты."""
+    fields = [Post._meta.get_field('pub_date'),
+              Comment._meta.get_field('created'),
+              Follow._meta.get_field('created')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    """Принимает записи по одной и сохраняет их пачками.
+
+    ``progress(model, saved, rate)`` вызывается после каждой пачки.
+    """
+
+    def __init__(self, batch_size, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.post_offset = Post.objects.aggregate(
+            last=Max('pk'))['last'] or 0
+        self.pending = {model: [] for model in MODELS}
+        self.saved = {model: 0 for model in MODELS}
+        self.skipped = {model: 0 for model in MODELS}
+        # Исходный id поста -> новый id или None, если пост пропущен.
+        self.post_ids = {}
+        self.followers = set()
+        self.started = time.monotonic()
+
+    def add(self, record):
+        model = record.get('model')
+        if model not in self.pending:
+            raise ValueError(f'Неизвестная модель: {model!r}')
+        self.pending[model].append(record)
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model):
+        for dependency in DEPENDENCIES.get(model, ()):
+            self.flush(dependency)
+        rows = self.pending[model]
+        if not rows:
+            return
+        self.pending[model] = []
+        with _keep_dates():
+            saved = getattr(self, f'_save_{model}')(rows)
+        self.saved[model] += saved
+        self.skipped[model] += len(rows) - saved
+        if self.progress is not None:
+            elapsed = max(time.monotonic() - self.started, 1e-6)
+            self.progress(
+                model, self.saved[model], sum(self.saved.values()) / elapsed)
+
+    def finish(self, rebuild=True):
+        """Сохраняет остатки и пересчитывает производные данные."""
+        for model in MODELS:
+            self.flush(model)
+        self._reset_sequences()
+        if rebuild:
+            counters.rebuild()
+            timeline.rebuild()
+            search.rebuild()
+        follow_graph.forget(self.followers)
+        feed_cache.invalidate_all()
+
+    @staticmethod
+    def _reset_sequences():
+        """Сдвигает последовательности id за импортированные посты: на
+        PostgreSQL следующий ``Post.objects.create`` иначе получил бы уже
+        занятый id."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    @staticmethod
+    def _user_ids(usernames):
+        return dict(User.objects.filter(
+            username__in=set(usernames)).values_list('username', 'pk'))
+
+    def _save_user(self, rows):
+        password = make_password(None)
+        users = [
+            User(
+                username=row['username'],
+                first_name=row.get('first_name') or '',
+                last_name=row.get('last_name') or '',
+                email=row.get('email') or '',
+                password=password,
+            )
+            for row in rows
+        ]
+        existing = self._user_ids(user.username for user in users)
+        User.objects.bulk_create(
+            [user for user in users if user.username not in existing],
+            ignore_conflicts=True)
+        return len(users) - len(existing)
+
+    def _save_group(self, rows):
+        existing = set(Group.objects.filter(
+            slug__in=[row['slug'] for row in rows]).values_list(
+            'slug', flat=True))
+        groups = [
+            Group(
+                slug=row['slug'],
+                title=row.get('title') or row['slug'],
+                description=row.get('description') or '',
+            )
+            for row in rows if row['slug'] not in existing
+        ]
+        Group.objects.bulk_create(
+            groups, ignore_conflicts=True)
+        return len(groups)
+
+    def _save_post(self, rows):
+        authors = self._user_ids(row['author'] for row in rows)
+        groups = dict(Group.objects.filter(
+            slug__in={row['group'] for row in rows if row.get('group')}
+        ).values_list('slug', 'pk'))
+        posts = []
+        for row in rows:
+            source_id = int(row['id'])
+            if row['author'] not in authors:
+                self.post_ids[source_id] = None
+                continue
+            self.post_ids[source_id] = self.post_offset + source_id
+            posts.append(Post(
+                pk=self.post_ids[source_id],
+                author_id=authors[row['author']],
+                group_id=groups.get(row.get('group')),
+                text=row['text'],
+                pub_date=_parse_date(row.get('pub_date')),
+                image=row.get('image') or '',
+            ))
+        Post.objects.bulk_create(posts)
+        return len(posts)
+
+    def _post_id(self, source_id):
+        """Новый id поста этой загрузки; None — пост был пропущен."""
+        source_id = int(source_id)
+        if source_id not in self.post_ids:
+            raise ValueError(
+                f'комментарий к посту {source_id}, которого нет в загрузке')
+        return self.post_ids[source_id]
+
+    def _save_comment(self, rows):
+        authors = self._user_ids(row['author'] for row in rows)
+        comments = [
+            Comment(
+                post_id=post_id,
+                author_id=authors[row['author']],
+                text=row['text'],
+                created=_parse_date(row.get('created')),
+            )
+            for row, post_id in (
+                (row, self._post_id(row['post'])) for row in rows)
+            if row['author'] in authors and post_id is not None
+        ]
+        Comment.objects.bulk_create(comments)
+        return len(comments)
+
+    def _save_follow(self, rows):
+        users = self._user_ids(
+            name for row in rows for name in (row['user'], row['author']))
+        follows = [
+            Follow(
+                user_id=users[row['user']],
+                author_id=users[row['author']],
+                created=_parse_date(row.get('created')),
+            )
+            for row in rows
+            if row['user'] in users and row['author'] in users
+            and row['user'] != row['author']
+        ]
+        Follow.objects.bulk_create(
+            follows, ignore_conflicts=True)
+        self.followers.update(follow.user_id for follow in follows)
+        return len(follows)
@@ -0,0 +1,222 @@
+"""Популярные посты: общий рейтинг и рейтинги групп.
+
+Рейтинг поста — сумма вкладов событий с прямым затуханием (forward
+decay): событие в момент ``t`` весит ``exp(λ·(t − L))``, где ``L`` —
+опорный момент, а ``λ`` задаётся периодом полураспада
+``TRENDING_HALF_LIFE``. Вклады не пересчитываются со временем: свежие
+события просто весят экспоненциально больше старых, поэтому рейтинг
+обновляется прибавлением. Когда вес становится слишком большим, опорный
+момент сдвигается, а все рейтинги умножаются на общий множитель.
+
+Новый пост получает вклад по охвату автора (логарифм числа
+подписчиков), каждый новый комментарий — фиксированный вклад, так что
+рейтинг отражает скорость комментирования. Пост, вытесненный из
+кандидатов, при новых комментариях набирает рейтинг заново.
+
+``refresh`` обрабатывает только посты и комментарии с id больше уже
+учтённых и хранит в кэше ``TRENDING_CANDIDATES`` лучших постов; без этого
+состояния пересчёт начинается заново с окна ``TRENDING_WINDOW``. Готовые
+списки ``TRENDING_SIZE`` лучших — общий и по группам — пишутся в таблицу
+``TrendingList``, поэтому их видят все процессы при любом бэкенде кэша.
+Страницы ``/popular/`` читают эти списки и не сканируют таблицу постов.
+
+Пересчёт идёт командой ``manage.py update_trending`` или фоновой задачей:
+первое событие откладывает её на ``TRENDING_INTERVAL`` секунд, и она
+учитывает все события, пришедшие за это время.
+"""
+import json
+import math
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import feed_cache, tasks
+from .constants import (TRENDING_BATCH_SIZE, TRENDING_CANDIDATES,
+                        TRENDING_COMMENT_WEIGHT, TRENDING_HALF_LIFE,
+                        TRENDING_INTERVAL, TRENDING_REACH_WEIGHT,
+                        TRENDING_SIZE, TRENDING_WINDOW)
+from .models import AuthorStats, Comment, Post, TrendingList
+
+STATE_KEY = 'trending:state'
+LOCK_KEY = 'trending:lock'
+SCHEDULED_KEY = 'trending:scheduled'
+GLOBAL = 'all'
+SCOPE = ('trending',)
+DECAY = math.log(2) / TRENDING_HALF_LIFE
+# Порог сдвига опорного момента: exp(50) далеко от переполнения float,
+# а старые рейтинги после умножения на exp(-50) не обнуляются.
+MAX_EXPONENT = 50
+
+
+def _empty_state(now):
+    since = now - TRENDING_WINDOW
+    return {
+        'landmark': now,
+        'last_post': _first_id(Post, 'pub_date', since),
+        'last_comment': _first_id(Comment, 'created', since),
+        'scores': {},
+    }
+
+
+def _first_id(model, field, since):
+    """Id, после которого начинаются записи окна ``TRENDING_WINDOW``."""
+    start = datetime.fromtimestamp(since, timezone.utc)
+    first = model.objects.filter(**{f'{field}__gte': start}).order_by(
+        'pk').values_list('pk', flat=True).first()
+    if first is None:
+        return model.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+    return first - 1
+
+
+def weight(moment, landmark):
+    return math.exp(DECAY * (moment - landmark))
+
+
+def _rescale(state, now):
+    if DECAY * (now - state['landmark']) < MAX_EXPONENT:
+        return
+    factor = weight(state['landmark'], now)
+    for entry in state['scores'].values():
+        entry[0] *= factor
+    state['landmark'] = now
+
+
+def _add(scores, post_id, group_id, amount):
+    entry = scores.setdefault(post_id, [0.0, group_id])
+    entry[0] += amount
+
+
+def _new_posts(state):
+    posts = Post.objects.filter(pk__gt=state['last_post']).order_by(
+        'pk').values_list('pk', 'author_id', 'group_id', 'pub_date')
+    for batch in _batches(posts):
+        followers = dict(AuthorStats.objects.filter(
+            user_id__in={row[1] for row in batch}).values_list(
+            'user_id', 'followers_count'))
+        for post_id, author_id, group_id, pub_date in batch:
+            reach = math.log1p(followers.get(author_id, 0))
+            _add(state['scores'], post_id, group_id,
+                 TRENDING_REACH_WEIGHT * (1 + reach)
+                 * weight(pub_date.timestamp(), state['landmark']))
+        state['last_post'] = batch[-1][0]
+
+
+def _new_comments(state):
+    comments = Comment.objects.filter(pk__gt=state['last_comment']).order_by(
+        'pk').values_list('pk', 'post_id', 'post__group_id', 'created')
+    for batch in _batches(comments):
+        for _, post_id, group_id, created in batch:
+            _add(state['scores'], post_id, group_id,
+                 TRENDING_COMMENT_WEIGHT
+                 * weight(created.timestamp(), state['landmark']))
+        state['last_comment'] = batch[-1][0]
+
+
+def _batches(queryset):
+    last = None
+    while True:
+        rows = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(rows[:TRENDING_BATCH_SIZE])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def _prune(state):
+    """Оставляет лучших кандидатов с актуальными группами."""
+    scores = state['scores']
+    best = sorted(scores, key=lambda pk: scores[pk][0], reverse=True)
+    best = best[:TRENDING_CANDIDATES]
+    groups = dict(Post.objects.filter(pk__in=best).values_list(
+        'pk', 'group_id'))
+    state['scores'] = {
+        pk: [scores[pk][0], groups[pk]] for pk in best if pk in groups
+    }
+
+
+def _top_lists(scores):
+    ranked = sorted(scores, key=lambda pk: scores[pk][0], reverse=True)
+    lists = {GLOBAL: ranked[:TRENDING_SIZE]}
+    for pk in ranked:
+        group_id = scores[pk][1]
+        if group_id is None:
+            continue
+        top = lists.setdefault(group_id, [])
+        if len(top) < TRENDING_SIZE:
+            top.append(pk)
+    return lists
+
+
+def _save_lists(lists):
+    with transaction.atomic():
+        TrendingList.objects.all().delete()
+        TrendingList.objects.bulk_create([
+            TrendingList(key=str(key), post_ids=json.dumps(ids))
+            for key, ids in lists.items()
+        ])
+
+
+def refresh(now=None):
+    """Учитывает новые посты и комментарии; возвращает False, если
+    пересчёт уже идёт в другом процессе."""
+    if not cache.add(LOCK_KEY, 1, TRENDING_INTERVAL * 10):
+        return False
+    try:
+        now = time.time() if now is None else now
+        state = cache.get(STATE_KEY) or _empty_state(now)
+        _rescale(state, now)
+        _new_posts(state)
+        _new_comments(state)
+        _prune(state)
+        _save_lists(_top_lists(state['scores']))
+        cache.set(STATE_KEY, state, None)
+        feed_cache.bump(SCOPE)
+        return True
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def schedule():
+    """Ставит пересчёт в очередь через ``TRENDING_INTERVAL``, если он ещё
+    не стоит."""
+    if cache.add(SCHEDULED_KEY, 1, TRENDING_INTERVAL):
+        tasks.refresh_trending.delay_after(TRENDING_INTERVAL)
+
+
+def run_scheduled():
+    """Пересчёт из очереди: события после его начала ставят следующий."""
+    cache.delete(SCHEDULED_KEY)
+    return refresh()
+
+
+def reset():
+    cache.delete(STATE_KEY)
+    TrendingList.objects.all().delete()
+
+
+def top_ids(group_id=None):
+    """Id популярных постов по убыванию рейтинга."""
+    ids = TrendingList.objects.filter(
+        key=str(group_id or GLOBAL)).values_list('post_ids', flat=True).first()
+    return json.loads(ids) if ids else []
+
+
+class TopPosts:
+    """Популярные посты для ``Paginator``: загружается только срез."""
+
+    def __init__(self, group_id=None):
+        self.ids = top_ids(group_id)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        ids = self.ids[key]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
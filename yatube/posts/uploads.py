@@ -0,0 +1,90 @@
+"""Потоковый приём и пережатие изображений постов.
+
+``LimitedUploadHandler`` пишет загружаемый файл на диск по частям и
+перестаёт его принимать, как только превышен лимит по размеру, так что
+память воркера не зависит от размера запроса. ``PostForm`` отклоняет такие
+файлы до того, как Pillow их откроет, затем проверяет число пикселей по
+заголовку и только после этого декодирует картинку в ``reencode``.
+"""
+import io
+import os
+
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image, ImageOps
+
+from .constants import (IMAGE_FORMATS, IMAGE_MAX_PIXELS, IMAGE_MAX_SIDE,
+                        IMAGE_MAX_UPLOAD_SIZE, IMAGE_SAVE_OPTIONS)
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Сохраняет файл во временный, отбрасывая всё сверх лимита.
+
+    Слишком большой файл получает атрибут ``oversized = True`` и реальный
+    размер запроса в ``size``; его содержимое обрезано и не используется.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.received = 0
+        self.oversized = False
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > IMAGE_MAX_UPLOAD_SIZE:
+            self.oversized = True
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.oversized = self.oversized
+        upload.size = self.received
+        return upload
+
+
+def is_oversized(upload):
+    return (getattr(upload, 'oversized', False)
+            or upload.size > IMAGE_MAX_UPLOAD_SIZE)
+
+
+def too_many_pixels(image):
+    """Проверка по заголовку: ``image`` — открытый, но не декодированный.
+
+    Лимит проверяется здесь, а не через глобальный
+    ``Image.MAX_IMAGE_PIXELS``, чтобы не менять Pillow для всего процесса.
+    """
+    width, height = image.size
+    return width * height > IMAGE_MAX_PIXELS
+
+
+def output_format(has_alpha):
+    Image.init()
+    for name in IMAGE_FORMATS:
+        if name in Image.SAVE:
+            return name
+    return 'PNG' if has_alpha else 'JPEG'
+
+
+def reencode(upload):
+    """Уменьшает картинку до ``IMAGE_MAX_SIDE``, убирает метаданные и
+    сохраняет в современном формате. У анимаций остаётся первый кадр.
+    """
+    upload.seek(0)
+    with Image.open(upload) as source:
+        # JPEG декодируется сразу в уменьшенном масштабе.
+        source.draft(source.mode, (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+        image = ImageOps.exif_transpose(source)
+        has_alpha = (image.mode in ('RGBA', 'LA', 'PA')
+                     or 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        image.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), Image.LANCZOS)
+    image.info.clear()
+    fmt = output_format(has_alpha)
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **IMAGE_SAVE_OPTIONS.get(fmt, {}))
+    extension = 'jpg' if fmt == 'JPEG' else fmt.lower()
+    name = f'{os.path.splitext(upload.name)[0]}.{extension}'
+    return InMemoryUploadedFile(
+        buffer, getattr(upload, 'field_name', None), name, Image.MIME[fmt],
+        buffer.tell(), None)
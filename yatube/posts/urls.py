@@ -7,10 +7,20 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('popular/', views.popular, name='popular'),
+    path('group/<slug:slug>/popular/', views.group_popular,
+         name='group_popular'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/followers/', views.followers,
+         name='followers'),
+    path('profile/<str:username>/following/', views.following,
+         name='following'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('search/', views.post_search, name='search'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('posts/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
@@ -1,10 +1,147 @@
+import base64
+import binascii
+from collections.abc import Sequence
+from datetime import datetime
+
 from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+
+from .constants import (COMMENTS_CURSOR_PARAM, COMMENTS_PER_PAGE,
+                        CURSOR_PARAM, POST_PER_PAGE)
+from .models import Comment
+
+
+def encode_cursor(direction, obj, field='pub_date'):
+    raw = f'{direction}|{getattr(obj, field).isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (direction, pub_date, pk) или None для битого курсора."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = raw.split('|')
+        if direction not in ('next', 'prev'):
+            return None
+        return direction, datetime.fromisoformat(pub_date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (pub_date, id) без COUNT и OFFSET.
+
+    Страница выбирается условием «строго раньше/позже курсора», поэтому
+    стоимость запроса не зависит от глубины страницы. ``field`` и
+    ``descending`` задают другую сортировку, например комментарии по
+    (created, id) от старых к новым. Номеров страниц и общего числа
+    объектов нет: шаблоны и API различают такие страницы по
+    ``cursor_mode``.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date',
+                 descending=True):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.field = field
+        self.descending = descending
+
+    def get_cursor_page(self, cursor=None):
+        decoded = decode_cursor(cursor) if cursor else None
+        objects = self.object_list
+        direction = 'next' if decoded is None else decoded[0]
+        backwards = (direction == 'next') == self.descending
+        lookup = 'lt' if backwards else 'gt'
+        if decoded is not None:
+            _, value, pk = decoded
+            objects = objects.filter(
+                Q(**{f'{self.field}__{lookup}': value})
+                | Q(**{self.field: value, f'pk__{lookup}': pk})
+            )
+        sign = '-' if backwards else ''
+        rows = list(objects.order_by(f'{sign}{self.field}', f'{sign}pk')[
+            :self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'next':
+            has_next, has_previous = has_more, decoded is not None
+        else:
+            rows = rows[::-1]
+            has_next, has_previous = True, has_more
+        return CursorPage(rows, self, has_next, has_previous)
+
 
-from .constants import POST_PER_PAGE
+class CursorPage(Sequence):
+    """Страница ``CursorPaginator``: объекты и курсоры соседних страниц.
+    """
+    cursor_mode = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return encode_cursor(
+            'next', self.object_list[-1], self.paginator.field)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return encode_cursor(
+            'prev', self.object_list[0], self.paginator.field)
 
 
 def show_paginator(request, objects_list):
-    paginator = Paginator(objects_list.order_by('-pub_date'), POST_PER_PAGE)
+    """Страница ленты.
+
+    По умолчанию — постраничная навигация по номеру страницы; если в
+    запросе есть параметр ``cursor`` (в том числе пустой), лента
+    отдаётся курсорной страницей без COUNT(*). Явная сортировка
+    ``objects_list`` сохраняется, иначе лента сортируется по дате.
+    Уже упорядоченные последовательности (например, результаты поиска)
+    листаются только по номеру страницы.
+    """
+    if isinstance(objects_list, QuerySet):
+        if CURSOR_PARAM in request.GET:
+            paginator = CursorPaginator(objects_list, POST_PER_PAGE)
+            return paginator.get_cursor_page(request.GET.get(CURSOR_PARAM))
+        if not objects_list.query.order_by:
+            objects_list = objects_list.order_by('-pub_date', '-pk')
+    paginator = Paginator(objects_list, POST_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def comments_page(request, post_id):
+    """Страница комментариев поста по (created, id), авторы — одним JOIN."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author').order_by('created', 'pk')
+    paginator = CursorPaginator(
+        comments, COMMENTS_PER_PAGE, field='created', descending=False)
+    return paginator.get_cursor_page(request.GET.get(COMMENTS_CURSOR_PARAM))
@@ -1,56 +1,173 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.http import urlencode
 
+from core.sqlite import retry_on_locked
+
+from . import (counters, feed_cache, follow_graph, search, tasks, timeline,
+               trending)
+from .constants import CURSOR_PARAM
 from .forms import PostForm, CommentForm
 from .models import Group, Post, Follow
-from .utils import show_paginator
+from .utils import comments_page, show_paginator
 
 
-@cache_page(20, key_prefix='index_page')
 def index(request):
-    context = {
-        'page_obj': show_paginator(request, Post.objects.all()),
-    }
-    return render(request, 'posts/index.html', context)
+    def build():
+        context = {
+            'page_obj': show_paginator(request, Post.objects.for_feed()),
+        }
+        return render(request, 'posts/index.html', context)
+    return feed_cache.cached_response(request, [('posts',)], build)
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    context = {
-        'group': group,
-        'posts': posts,
-        'page_obj': show_paginator(request, posts),
-    }
-    return render(request, 'posts/group_list.html', context)
+
+    def build():
+        posts = group.posts.for_feed()
+        context = {
+            'group': group,
+            'page_obj': show_paginator(request, posts),
+        }
+        return render(request, 'posts/group_list.html', context)
+    return feed_cache.cached_response(request, [('group', group.pk)], build)
+
+
+def popular(request):
+    def build():
+        context = {
+            'title': 'Популярное',
+            'page_obj': show_paginator(request, trending.TopPosts()),
+        }
+        return render(request, 'posts/popular.html', context)
+    return feed_cache.cached_response(
+        request, [trending.SCOPE, ('posts',)], build)
+
+
+def group_popular(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+
+    def build():
+        context = {
+            'title': f'Популярное в группе {group}',
+            'group': group,
+            'page_obj': show_paginator(request, trending.TopPosts(group.pk)),
+        }
+        return render(request, 'posts/popular.html', context)
+    return feed_cache.cached_response(
+        request, [trending.SCOPE, ('posts',), ('group', group.pk)], build)
 
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    context = {
-        'author': author,
-        'following': (request.user.is_authenticated
-                      and author.following.filter(user=request.user)),
-        'total_posts': post_list.count(),
-        'page_obj': show_paginator(request, post_list),
-    }
-    return render(request, 'posts/profile.html', context)
+
+    def build():
+        post_list = author.posts.for_feed()
+        context = {
+            'author': author,
+            'following': follow_graph.is_following(request.user, author.pk),
+            'total_posts': counters.for_user(author.pk).posts_count,
+            'page_obj': show_paginator(request, post_list),
+        }
+        return render(request, 'posts/profile.html', context)
+    return feed_cache.cached_response(request, [('author', author.pk)], build)
+
+
+def followers(request, username):
+    author = get_object_or_404(User, username=username)
+
+    def build():
+        context = {
+            'author': author,
+            'title': f'Подписчики {author.get_full_name() or author}',
+            'page_obj': follow_graph.followers_page(
+                author.pk, request.GET.get(CURSOR_PARAM)),
+            'people_field': 'user',
+        }
+        return render(request, 'posts/follow_list.html', context)
+    return feed_cache.cached_response(request, [('author', author.pk)], build)
+
+
+def following(request, username):
+    author = get_object_or_404(User, username=username)
+
+    def build():
+        context = {
+            'author': author,
+            'title': f'Подписки {author.get_full_name() or author}',
+            'page_obj': follow_graph.following_page(
+                author.pk, request.GET.get(CURSOR_PARAM)),
+            'people_field': 'author',
+        }
+        return render(request, 'posts/follow_list.html', context)
+    return feed_cache.cached_response(
+        request, [('follows', author.pk)], build)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
-    form = CommentForm(request.POST or None)
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
+
+    def build():
+        form = CommentForm(request.POST or None)
+        context = {
+            'post': post,
+            'post_number': counters.for_user(post.author_id).posts_count,
+            'comments': comments_page(request, post.pk),
+            'form': form,
+        }
+        return render(request, 'posts/post_detail.html', context)
+    return feed_cache.cached_response(
+        request, [('post', post.pk), ('author', post.author_id)], build)
+
+
+def post_comments(request, post_id):
+    """Следующие страницы комментариев: HTML-фрагмент или JSON."""
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+
+    def build():
+        comments = comments_page(request, post_id)
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'comments': [
+                    {
+                        'id': comment.pk,
+                        'author': comment.author.username,
+                        'author_name': comment.author.get_full_name(),
+                        'text': comment.text,
+                        'created': comment.created.isoformat(),
+                    }
+                    for comment in comments
+                ],
+                'next': comments.next_cursor,
+            })
+        context = {
+            'post_id': post_id,
+            'comments': comments,
+        }
+        return render(request, 'posts/includes/comments_page.html', context)
+    return feed_cache.cached_response(request, [('post', post_id)], build)
+
+
+def post_search(request):
+    query = request.GET.get('q', '').strip()
     context = {
-        'post': post,
-        'post_number': post.author.posts.count(),
-        'comments': comments,
-        'form': form,
+        'query': query,
+        'page_query': urlencode({'q': query}) + '&',
+        'page_obj': show_paginator(request, search.search(query)),
     }
-    return render(request, 'posts/post_detail.html', context)
+    return render(request, 'posts/search.html', context)
+
+
+@retry_on_locked
+def _create_post(post):
+    with transaction.atomic():
+        post.save()
+        if post.image:
+            tasks.generate_thumbnails.delay(post_id=post.pk)
 
 
 @login_required
@@ -59,7 +176,7 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        _create_post(post)
         return redirect('posts:profile', post.author)
     context = {
         'form': form,
@@ -79,7 +196,10 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        post = form.save()
+        with transaction.atomic():
+            post = form.save()
+            if post.image and 'image' in form.changed_data:
+                tasks.generate_thumbnails.delay(post_id=post.pk)
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -89,6 +209,12 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+@retry_on_locked
+def _create_comment(comment):
+    with transaction.atomic():
+        comment.save()
+
+
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -97,13 +223,13 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        _create_comment(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = timeline.feed_for(request.user)
     context = {
         'page_obj': show_paginator(request, post_list)
     }
@@ -113,8 +239,9 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     if username != request.user.username:
-        author = get_object_or_404(User, username=username)
-        Follow.objects.get_or_create(user=request.user, author=author)
+        author = get_object_or_404(User.objects.only('pk'), username=username)
+        retry_on_locked(Follow.objects.get_or_create)(
+            user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
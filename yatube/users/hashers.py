@@ -0,0 +1,84 @@
+"""Хэшеры паролей с настраиваемой стоимостью.
+
+``ScryptPasswordHasher`` использует ``hashlib.scrypt`` из стандартной
+библиотеки: стоимость задаётся памятью (``SCRYPT_WORK_FACTOR`` ×
+``SCRYPT_BLOCK_SIZE``), а не числом итераций, поэтому при той же
+стойкости к подбору на GPU вход дешевле по процессору, чем PBKDF2. Формат
+хэша совпадает со scrypt-хэшером новых версий Django.
+
+``Argon2PasswordHasher`` — хэшер Django с параметрами из настроек;
+нужен пакет ``argon2-cffi``.
+
+Оба хэшера сообщают ``must_update``, когда параметры хэша отличаются от
+настроек: при следующем входе Django пересчитает пароль с новыми.
+"""
+import base64
+import hashlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+class ScryptPasswordHasher(hashers.BasePasswordHasher):
+    algorithm = 'scrypt'
+    dklen = 64
+
+    def params(self):
+        return (settings.SCRYPT_WORK_FACTOR, settings.SCRYPT_BLOCK_SIZE,
+                settings.SCRYPT_PARALLELISM)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        default_n, default_r, default_p = self.params()
+        n, r, p = n or default_n, r or default_r, p or default_p
+        hash_ = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            maxmem=256 * n * r * p, dklen=self.dklen)
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return f'{self.algorithm}${n}${salt}${r}${p}${hash_}'
+
+    def _decode(self, encoded):
+        algorithm, n, salt, r, p, hash_ = encoded.split('$')
+        assert algorithm == self.algorithm
+        return int(n), salt, int(r), int(p), hash_
+
+    def verify(self, password, encoded):
+        n, salt, r, p, _ = self._decode(encoded)
+        return constant_time_compare(
+            encoded, self.encode(password, salt, n, r, p))
+
+    def safe_summary(self, encoded):
+        n, salt, r, p, hash_ = self._decode(encoded)
+        return OrderedDict([
+            (_('algorithm'), self.algorithm),
+            (_('work factor'), n),
+            (_('block size'), r),
+            (_('parallelism'), p),
+            (_('salt'), hashers.mask_hash(salt)),
+            (_('hash'), hashers.mask_hash(hash_)),
+        ])
+
+    def must_update(self, encoded):
+        n, _, r, p, _ = self._decode(encoded)
+        return (n, r, p) != self.params()
+
+    def harden_runtime(self, password, encoded):
+        pass
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
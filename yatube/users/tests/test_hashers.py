@@ -0,0 +1,53 @@
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import Client, TestCase, override_settings
+
+from core import benchmark
+from posts.models import User
+from users.hashers import ScryptPasswordHasher
+
+FAST_SCRYPT = {
+    'SCRYPT_WORK_FACTOR': 2 ** 4,
+    'SCRYPT_BLOCK_SIZE': 1,
+    'SCRYPT_PARALLELISM': 1,
+}
+SCRYPT_FIRST = [
+    'users.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+
+@override_settings(PASSWORD_HASHERS=SCRYPT_FIRST, **FAST_SCRYPT)
+class ScryptHasherTests(TestCase):
+    def test_roundtrip(self):
+        """Пароль проверяется по scrypt-хэшу с параметрами в хэше"""
+        encoded = make_password('secret')
+        self.assertTrue(encoded.startswith('scrypt$16$'))
+        self.assertTrue(check_password('secret', encoded))
+        self.assertFalse(check_password('wrong', encoded))
+
+    def test_must_update_on_new_params(self):
+        """Хэш со старыми параметрами требует пересчёта"""
+        hasher = ScryptPasswordHasher()
+        encoded = make_password('secret')
+        self.assertFalse(hasher.must_update(encoded))
+        with self.settings(SCRYPT_WORK_FACTOR=2 ** 5):
+            self.assertTrue(hasher.must_update(encoded))
+            self.assertTrue(check_password('secret', encoded))
+
+    def test_rehash_on_login(self):
+        """При входе старый хэш прозрачно заменяется предпочтительным"""
+        user = User.objects.create(username='reader')
+        user.password = make_password('secret', hasher='md5')
+        user.save()
+        self.assertTrue(Client().login(username='reader', password='secret'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+
+
+class HasherBenchmarkTests(TestCase):
+    @override_settings(**FAST_SCRYPT)
+    def test_measure_hashers(self):
+        """Замер сообщает входы в секунду для доступных хэшеров"""
+        results = benchmark.measure_hashers(iterations=1)
+        self.assertIn('scrypt', results)
+        self.assertGreater(results['scrypt']['per_second'], 0)
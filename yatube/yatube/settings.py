@@ -11,18 +11,22 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
+from importlib.util import find_spec
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = os.getenv("SECRET_KEY", "secret_key")
 
-DEBUG = True
+# В продакшене DEBUG=0: при DEBUG Django хранит в памяти каждый SQL-запрос.
+DEBUG = os.getenv('DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
     '[::1]',
     'testserver',
+    *filter(None, os.getenv('ALLOWED_HOSTS', '').split(',')),
 ]
 
 INSTALLED_APPS = [
@@ -40,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.routing.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,12 +59,24 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
+# Без DEBUG шаблоны компилируются один раз на процесс (cached.Loader).
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+# Шаблоны debug toolbar находит app_directories.Loader из TEMPLATE_LOADERS.
+SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W006']
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
+        'APP_DIRS': False,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -72,13 +90,81 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
-DATABASES = {
-    'default': {
+# База: DB_ENGINE sqlite (по умолчанию) или postgresql (нужен psycopg2).
+# Соединения живут DB_CONN_MAX_AGE секунд. DB_POOLER=pgbouncer — DB_HOST
+# указывает на pgbouncer в режиме transaction, где серверные курсоры
+# недоступны. SQLite ждёт блокировку DB_TIMEOUT секунд.
+# Реплики для чтения лент (core.routing): DB_REPLICA_HOSTS через запятую.
+# У SQLite алиас реплики — второе соединение с тем же файлом (в тестах —
+# зеркало default); читать с него начинают при DB_SIMULATE_REPLICA=1.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 60))
+DB_POOLER = os.getenv('DB_POOLER', '')
+
+PRIMARY_DATABASES = {
+    'sqlite': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'OPTIONS': {'timeout': int(os.getenv('DB_TIMEOUT', 20))},
+    },
+    'postgresql': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('DB_NAME', 'yatube'),
+        'USER': os.getenv('DB_USER', 'yatube'),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', '127.0.0.1'),
+        'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER == 'pgbouncer',
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+        },
+    },
+}
+REPLICA_HOSTS = {
+    'sqlite': [''],
+    'postgresql': list(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))),
 }
 
+DATABASES = {'default': PRIMARY_DATABASES[DB_ENGINE]}
+for number, host in enumerate(REPLICA_HOSTS[DB_ENGINE], 1):
+    DATABASES[f'replica_{number}'] = dict(
+        DATABASES['default'],
+        **({'HOST': host} if host else {}),
+        TEST={'MIRROR': 'default'},
+    )
+DATABASE_REPLICAS = [
+    alias for alias in DATABASES
+    if alias != 'default' and (
+        DB_ENGINE != 'sqlite' or os.getenv('DB_SIMULATE_REPLICA') == '1')
+]
+DATABASE_ROUTERS = ['core.routing.PrimaryReplicaRouter']
+
+# PRAGMA каждого соединения SQLite (core.sqlite); SQLITE_TUNING=0 отключает.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+} if os.getenv('SQLITE_TUNING', '1') == '1' else {}
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+DATABASE_REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:popular',
+    'posts:group_popular',
+    'posts:followers',
+    'posts:following',
+    'posts:search',
+    'api:index',
+    'api:group_list',
+    'api:profile',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -94,6 +180,34 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Новые пароли хэшируются PASSWORD_HASHER (users.hashers): scrypt из
+# стандартной библиотеки или argon2 (нужен argon2-cffi). Остальные хэшеры
+# проверяют старые пароли, при входе хэш пересчитывается предпочтительным.
+PASSWORD_HASHER_CLASSES = {
+    'scrypt': 'users.hashers.ScryptPasswordHasher',
+    'argon2': 'users.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'scrypt')
+if PASSWORD_HASHER == 'argon2' and find_spec('argon2') is None:
+    PASSWORD_HASHER = 'scrypt'
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items()
+    if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+SCRYPT_WORK_FACTOR = int(os.getenv('SCRYPT_WORK_FACTOR', 2 ** 14))
+SCRYPT_BLOCK_SIZE = int(os.getenv('SCRYPT_BLOCK_SIZE', 8))
+SCRYPT_PARALLELISM = int(os.getenv('SCRYPT_PARALLELISM', 1))
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', 19 * 1024))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', 1))
+
+# Тесты (manage.py test и pytest) хэшируют пароли быстрым MD5.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+if TESTING:
+    PASSWORD_HASHERS.insert(
+        0, 'django.contrib.auth.hashers.MD5PasswordHasher')
+
 LANGUAGE_CODE = 'ru'
 
 TIME_ZONE = 'UTC'
@@ -118,13 +232,89 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Файлы MEDIA_URL отдаёт core.media.serve. MEDIA_ACCEL_REDIRECT — префикс
+# internal-location nginx (например, /protected-media/), через который
+# nginx сам отдаёт файл по заголовку X-Accel-Redirect. Все файлы, включая
+# миниатюры, кэшируются на MEDIA_MAX_AGE секунд.
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT', '')
+MEDIA_MAX_AGE = int(os.getenv('MEDIA_MAX_AGE', 24 * 60 * 60))
+
+# Файлы принимаются потоком на диск с ограничением размера,
+# см. posts.uploads.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.LimitedUploadHandler']
+
+# Кэш общий для всех воркеров: страницы лент, сессии и KV-хранилище
+# sorl-thumbnail. CACHE_BACKEND: locmem (по умолчанию, один процесс),
+# file, memcached, redis или inprocess (замена Redis в памяти для тестов).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', {
+    'locmem': '',
+    'file': os.path.join(BASE_DIR, '.cache'),
+    'memcached': '127.0.0.1:11211',
+    'redis': 'redis://127.0.0.1:6379/0',
+    'inprocess': 'inprocess://default',
+}[CACHE_BACKEND])
+CACHE_OPTIONS = {
+    'memcached': {
+        'binary': True,
+        'behaviors': {'tcp_nodelay': True, 'ketama': True},
+    },
+    'redis': {
+        'MAX_CONNECTIONS': int(os.getenv('CACHE_MAX_CONNECTIONS', 50)),
+    },
+    'inprocess': {
+        'CLIENT_CLASS': 'core.cache.InProcessRedis',
+    },
+}
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': {
+            'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+            'file': 'django.core.cache.backends.filebased.FileBasedCache',
+            'memcached': 'django.core.cache.backends.memcached.PyLibMCCache',
+            'redis': 'core.cache.RedisCache',
+            'inprocess': 'core.cache.RedisCache',
+        }[CACHE_BACKEND],
+        'LOCATION': CACHE_LOCATION,
+        'OPTIONS': CACHE_OPTIONS.get(CACHE_BACKEND, {}),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'yatube'),
     }
 }
 
+# Фрагменты карточек постов ({% cache ... using="post_fragments" %}) лежат
+# в том же хранилище; отдельный алиас позволяет отключить их DummyCache.
+CACHES['post_fragments'] = dict(CACHES['default'])
+
+# Сессии в кэше с записью в базу не чаще раза в SESSION_WRITE_BEHIND секунд
+# (core.sessions); SESSION_ENGINE=django.contrib.sessions.backends.
+# signed_cookies хранит их в подписанной cookie без базы и кэша.
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'core.sessions')
+SESSION_CACHE_ALIAS = 'default'
+SESSION_WRITE_BEHIND = int(os.getenv('SESSION_WRITE_BEHIND', 60))
+
+# Пользователь запроса кэшируется на AUTH_USER_CACHE_TIMEOUT секунд
+# (core.auth). ModelBackend оставлен для сессий, созданных до его появления.
+AUTHENTICATION_BACKENDS = [
+    'core.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+THUMBNAIL_CACHE = 'default'
+
+# Фоновые задачи (core.tasks) разбирает `manage.py runworker`;
+# TASKS_ALWAYS_EAGER=1 выполняет их сразу в процессе запроса. Воркеру нужен
+# общий для процессов CACHE_BACKEND (проверка core.E001), поэтому с кэшем
+# в памяти процесса задачи по умолчанию выполняются сразу. Тесты разбирают
+# очередь сами.
+TASKS_ALWAYS_EAGER = os.getenv('TASKS_ALWAYS_EAGER', '1' if (
+    CACHE_BACKEND in ('locmem', 'inprocess') and not TESTING) else '') == '1'
+
+# Доля запросов, которые замеряет core.metrics.MetricsMiddleware (0 — не
+# замерять). Без METRICS_TOKEN /metrics/ доступен только с INTERNAL_IPS.
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 0.01))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]